@@ -3,23 +3,155 @@ Data Processing and Cloud Upload Service
 AI-generated code with multiple security and cloud integration issues
 """
 
-import requests
-import sqlite3
+import functools
+import json
 import os
 import logging
-import ssl
-import hashlib
-import hmac
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import quote, urlsplit
 
-#
-# Security fix: pull runtime secrets from environment variables instead of hardcoding.
-API_KEY = os.getenv("PROCESSOR_API_KEY")
-SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
-AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-AWS_SESSION_TOKEN = os.getenv("AWS_SESSION_TOKEN")
+# Performance: requests, sqlite3, ssl, hashlib/hmac, asyncio and the process pool are
+# imported where first used so short-lived callers only pay for what they touch.
 
-_DATA_PROTECTION_KEY = (os.getenv("APP_DATA_PROTECTION_KEY") or "").encode("utf-8")
+Settings = namedtuple("Settings", [
+    "api_key",
+    "api_base_url",
+    "webhook_endpoint",
+    "request_timeout",
+    "api_batch_size",
+    "api_batch_linger_ms",
+    "api_batch_endpoint",
+    "api_batch_inflight",
+    "async_per_destination",
+    "async_max_connections",
+    "data_protection_key",
+    "db_path",
+    "db_pool_size",
+    "db_pool_timeout",
+    "prehash_sensitive",
+    "prehash_workers",
+    "export_batch_size",
+    "aws_region",
+    "aws_access_key",
+    "aws_secret_key",
+    "aws_session_token",
+    "s3_endpoint_url",
+    "s3_part_size_mb",
+    "s3_max_concurrency",
+    "smtp_server",
+    "smtp_port",
+    "smtp_sender",
+    "smtp_password",
+    "smtp_pool_size",
+    "webhook_queue_path",
+    "webhook_workers",
+    "webhook_batch_size",
+    "webhook_max_attempts",
+    "webhook_shards",
+    "webhook_shard_lanes",
+    "write_batch_size",
+    "write_flush_ms",
+    "profile_sample_rate",
+])
+
+
+@functools.lru_cache(maxsize=None)
+def get_settings():
+    """
+    Service configuration, read from the environment once and cached.
+
+    Call ``get_settings.cache_clear()`` after changing the environment; existing
+    DataProcessor instances keep the settings they were built with, and the
+    hashing key is fixed by the first hashed value.
+    """
+    env = os.environ
+    # Security fix: pull runtime secrets from environment variables instead of hardcoding.
+    # Security fix: prefer HTTPS and configurable destination endpoints.
+    api_base_url = env.get("PROCESSOR_API_BASE_URL", "https://api.production-service.com/v1")
+    return Settings(
+        api_key=env.get("PROCESSOR_API_KEY"),
+        api_base_url=api_base_url,
+        webhook_endpoint=env.get("PROCESSOR_WEBHOOK_ENDPOINT", "https://internal-webhook.company.com/process"),
+        request_timeout=float(env.get("PROCESSOR_REQUEST_TIMEOUT", "5.0")),
+        api_batch_size=int(env.get("PROCESSOR_API_BATCH_SIZE", "50")),
+        api_batch_linger_ms=float(env.get("PROCESSOR_API_BATCH_LINGER_MS", "10")),
+        api_batch_endpoint=env.get("PROCESSOR_API_BATCH_ENDPOINT", f"{api_base_url}/process/batch"),
+        api_batch_inflight=int(env.get("PROCESSOR_API_BATCH_INFLIGHT", "4")),
+        async_per_destination=int(env.get("PROCESSOR_ASYNC_PER_DESTINATION", "32")),
+        async_max_connections=int(env.get("PROCESSOR_ASYNC_MAX_CONNECTIONS", "256")),
+        data_protection_key=(env.get("APP_DATA_PROTECTION_KEY") or "").encode("utf-8"),
+        db_path=env.get("APP_DB_PATH", "app_data.db"),
+        db_pool_size=int(env.get("APP_DB_POOL_SIZE", "5")),
+        db_pool_timeout=float(env.get("APP_DB_POOL_TIMEOUT", "5.0")),
+        prehash_sensitive=env.get("APP_PREHASH_SENSITIVE", "false").lower() in {"1", "true", "yes"},
+        prehash_workers=int(env.get("APP_PREHASH_WORKERS", "0")),
+        export_batch_size=int(env.get("APP_EXPORT_BATCH_SIZE", "10000")),
+        aws_region=env.get("AWS_REGION", "us-east-1"),
+        aws_access_key=env.get("AWS_ACCESS_KEY_ID"),
+        aws_secret_key=env.get("AWS_SECRET_ACCESS_KEY"),
+        aws_session_token=env.get("AWS_SESSION_TOKEN"),
+        s3_endpoint_url=env.get("AWS_S3_ENDPOINT_URL"),
+        s3_part_size_mb=float(env.get("AWS_S3_PART_SIZE_MB", "16")),
+        s3_max_concurrency=int(env.get("AWS_S3_MAX_CONCURRENCY", "10")),
+        smtp_server=env.get("SMTP_SERVER", "smtp.gmail.com"),
+        smtp_port=int(env.get("SMTP_PORT", "587")),
+        smtp_sender=env.get("SMTP_SENDER", "notifications@company.com"),
+        smtp_password=env.get("SMTP_PASSWORD"),
+        smtp_pool_size=int(env.get("SMTP_POOL_SIZE", "4")),
+        webhook_queue_path=env.get("PROCESSOR_WEBHOOK_QUEUE_PATH", "webhook_queue.db"),
+        webhook_workers=int(env.get("PROCESSOR_WEBHOOK_WORKERS", "4")),
+        webhook_batch_size=int(env.get("PROCESSOR_WEBHOOK_BATCH_SIZE", "20")),
+        webhook_max_attempts=int(env.get("PROCESSOR_WEBHOOK_MAX_ATTEMPTS", "5")),
+        webhook_shards=int(env.get("PROCESSOR_WEBHOOK_SHARDS", "0")),
+        webhook_shard_lanes=int(env.get("PROCESSOR_WEBHOOK_SHARD_LANES", "8")),
+        write_batch_size=int(env.get("APP_WRITE_BATCH_SIZE", "500")),
+        write_flush_ms=float(env.get("APP_WRITE_FLUSH_MS", "20")),
+        profile_sample_rate=float(env.get("PROCESSOR_PROFILE_SAMPLE_RATE", "0")),
+    )
+
+
+# Module-level names kept for existing importers; resolved lazily through get_settings.
+_SETTINGS_ALIASES = {
+    "API_KEY": "api_key",
+    "SMTP_PASSWORD": "smtp_password",
+    "AWS_ACCESS_KEY": "aws_access_key",
+    "AWS_SECRET_KEY": "aws_secret_key",
+    "AWS_SESSION_TOKEN": "aws_session_token",
+    "API_BASE_URL": "api_base_url",
+    "WEBHOOK_ENDPOINT": "webhook_endpoint",
+}
+
+
+def __getattr__(name):
+    field = _SETTINGS_ALIASES.get(name)
+    if field is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(get_settings(), field)
+
+
+_new_digest = None
+
+
+def _digest_factory():
+    """Build the per-value digest constructor on first use (HMAC-SHA256 when a protection key is set)."""
+    global _new_digest
+    import hashlib
+
+    key = get_settings().data_protection_key
+    if key:
+        import hmac
+
+        # Performance: key the HMAC once and copy the keyed state per value.
+        _new_digest = hmac.new(key, digestmod=hashlib.sha256).copy
+    else:
+        _new_digest = hashlib.sha256
+    return _new_digest
 
 
 def _hash_sensitive_value(value):
@@ -31,255 +163,2550 @@ def _hash_sensitive_value(value):
         raw_value = bytes(value)
     else:
         raw_value = str(value).encode("utf-8")
-    if _DATA_PROTECTION_KEY:
-        return hmac.new(_DATA_PROTECTION_KEY, raw_value, hashlib.sha256).hexdigest()
-    return hashlib.sha256(raw_value).hexdigest()
+    digest = (_new_digest or _digest_factory())()
+    digest.update(raw_value)
+    return digest.hexdigest()
 
 
-# Security fix: prefer HTTPS and configurable destination endpoints.
-API_BASE_URL = os.getenv("PROCESSOR_API_BASE_URL", "https://api.production-service.com/v1")
-WEBHOOK_ENDPOINT = os.getenv("PROCESSOR_WEBHOOK_ENDPOINT", "https://internal-webhook.company.com/process")
+_HEX_DIGITS = frozenset("0123456789abcdef")
 
 
-class DataProcessor:
+def _needs_hashing(value):
+    """Python mirror of the trigger check: non-null and not already a 64-char hex digest."""
+    if value is None:
+        return False
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return True
+    text = value if isinstance(value, str) else str(value)
+    return len(text) != 64 or text[:1] not in _HEX_DIGITS
+
+
+_USER_DATA_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS user_data (
+        id INTEGER PRIMARY KEY,
+        username TEXT,
+        password TEXT,
+        credit_card TEXT,
+        ssn TEXT,
+        created_at TIMESTAMP
+    )
+"""
+
+_USER_DATA_TRIGGERS_SQL = """
+    CREATE TRIGGER IF NOT EXISTS user_data_hash_insert
+    AFTER INSERT ON user_data
+    WHEN
+        (NEW.password IS NOT NULL AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')) OR
+        (NEW.credit_card IS NOT NULL AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')) OR
+        (NEW.ssn IS NOT NULL AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*'))
+    BEGIN
+        UPDATE user_data
+        SET password = CASE
+                WHEN NEW.password IS NOT NULL AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')
+                    THEN hash_sensitive(NEW.password)
+                ELSE password
+            END,
+            credit_card = CASE
+                WHEN NEW.credit_card IS NOT NULL AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')
+                    THEN hash_sensitive(NEW.credit_card)
+                ELSE credit_card
+            END,
+            ssn = CASE
+                WHEN NEW.ssn IS NOT NULL AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*')
+                    THEN hash_sensitive(NEW.ssn)
+                ELSE ssn
+            END
+        WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS user_data_hash_update
+    AFTER UPDATE ON user_data
+    WHEN
+        (NEW.password IS NOT NULL AND NEW.password != OLD.password AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')) OR
+        (NEW.credit_card IS NOT NULL AND NEW.credit_card != OLD.credit_card AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')) OR
+        (NEW.ssn IS NOT NULL AND NEW.ssn != OLD.ssn AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*'))
+    BEGIN
+        UPDATE user_data
+        SET password = CASE
+                WHEN NEW.password IS NOT NULL AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')
+                    THEN hash_sensitive(NEW.password)
+                ELSE password
+            END,
+            credit_card = CASE
+                WHEN NEW.credit_card IS NOT NULL AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')
+                    THEN hash_sensitive(NEW.credit_card)
+                ELSE credit_card
+            END,
+            ssn = CASE
+                WHEN NEW.ssn IS NOT NULL AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*')
+                    THEN hash_sensitive(NEW.ssn)
+                ELSE ssn
+            END
+        WHERE id = NEW.id;
+    END;
+"""
+
+# Performance: tuned once per connection; WAL lets readers proceed while a writer commits.
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+
+_USER_DATA_COLUMNS = ("id", "username", "password", "credit_card", "ssn", "created_at")
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older builds (999).
+_SQLITE_MAX_VARIABLES = 900
+
+_UPSERT_USER_SQL = (
+    f"INSERT INTO user_data ({', '.join(_USER_DATA_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _USER_DATA_COLUMNS)}) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in _USER_DATA_COLUMNS[1:])
+)
+
+_SENSITIVE_COLUMN_INDEXES = tuple(
+    _USER_DATA_COLUMNS.index(column) for column in ("password", "credit_card", "ssn")
+)
+
+# Below this many rows the process pool start-up costs more than it saves.
+_PREHASH_PARALLEL_MIN_ROWS = 50_000
+_PREHASH_CHUNK_SIZE = 10_000
+
+
+def _prehash_rows(rows):
+    """Hash the sensitive columns of ``_USER_DATA_COLUMNS``-ordered tuples in one pass."""
+    hash_value = _hash_sensitive_value
+    needs_hashing = _needs_hashing
+    hashed_rows = []
+    for row in rows:
+        row = list(row)
+        for index in _SENSITIVE_COLUMN_INDEXES:
+            value = row[index]
+            if needs_hashing(value):
+                row[index] = hash_value(value)
+        hashed_rows.append(tuple(row))
+    return hashed_rows
+
+
+def hash_sensitive_rows(rows, workers=None, chunk_size=_PREHASH_CHUNK_SIZE):
+    """
+    Pre-hash sensitive columns before INSERT so the table triggers become a no-op safety net.
+
+    Large batches are split across ``workers`` processes when requested.
+    """
+    rows = list(rows)
+    if not workers or workers < 2 or len(rows) < _PREHASH_PARALLEL_MIN_ROWS:
+        return _prehash_rows(rows)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+    hashed_rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for hashed_chunk in executor.map(_prehash_rows, chunks):
+            hashed_rows.extend(hashed_chunk)
+    return hashed_rows
+
+
+_S3_CLIENTS = {}
+_S3_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_s3_client(**client_args):
+    """Return a cached S3 client for this region/credential set; boto3 clients are thread-safe."""
+    cache_key = tuple(sorted(client_args.items()))
+    with _S3_CLIENTS_LOCK:
+        client = _S3_CLIENTS.get(cache_key)
+        if client is None:
+            import boto3
+
+            # A dedicated session avoids sharing boto3's non-thread-safe default session.
+            client = _S3_CLIENTS[cache_key] = boto3.session.Session().client('s3', **client_args)
+        return client
+
+
+def _prepare_connection(conn, pragmas=_SQLITE_PRAGMAS):
+    """Register the hashing UDF and apply connection-level pragmas."""
+    conn.create_function("hash_sensitive", 1, _hash_sensitive_value, deterministic=True)
+    for pragma in pragmas:
+        conn.execute(pragma)
+
+
+# Stored in the database's user_version once the schema below is in place; bump it when the DDL changes.
+_SCHEMA_VERSION = 1
+
+
+def _ensure_schema(conn):
+    """Create the user_data table and hashing triggers once per database file."""
+    # Performance: the marker lives in the file itself, so the DDL runs once per database (and again
+    # for a deleted and recreated file) while later connections only read one pragma.
+    if conn.execute("PRAGMA user_version").fetchone()[0] == _SCHEMA_VERSION:
+        return
+    try:
+        conn.executescript(
+            f"BEGIN IMMEDIATE; {_USER_DATA_TABLE_SQL}; {_USER_DATA_TRIGGERS_SQL} "
+            f"PRAGMA user_version = {_SCHEMA_VERSION}; COMMIT;"
+        )
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+
+_WEBHOOK_QUEUE_SQL = """
+    CREATE TABLE IF NOT EXISTS webhook_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        enqueued_at REAL NOT NULL,
+        available_at REAL NOT NULL,
+        claimed_at REAL,
+        completed_at REAL,
+        last_error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS webhook_queue_ready ON webhook_queue (status, available_at);
+"""
+
+
+# Queue entries are acknowledged to callers, so every commit on every queue connection is fsynced.
+_WEBHOOK_QUEUE_PRAGMAS = _SQLITE_PRAGMAS + ("PRAGMA synchronous=FULL",)
+
+
+def _ensure_webhook_queue_schema(conn):
+    conn.executescript(_WEBHOOK_QUEUE_SQL)
+
+
+class SQLiteConnectionPool:
+    """Thread-safe pool of prepared SQLite connections for a single database file."""
+
+    def __init__(self, db_path, max_size=5, timeout=5.0, ensure_schema=_ensure_schema, pragmas=_SQLITE_PRAGMAS):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db_path = db_path
+        self.ensure_schema = ensure_schema
+        self.pragmas = pragmas
+        self.max_size = max_size
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._schema_lock = threading.Lock()
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        # Performance: check the schema on this pool's first connection only; in-memory
+        # databases are private to each connection, so they always need it.
+        self._schema_ready = False
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+
+    def _create_connection(self):
+        import sqlite3
+
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        try:
+            _prepare_connection(conn, self.pragmas)
+            if not self._schema_ready:
+                # Connections are created outside the pool condition; concurrent first checkouts wait here.
+                with self._schema_lock:
+                    if not self._schema_ready:
+                        self.ensure_schema(conn)
+                        self._schema_ready = self.db_path != ":memory:"
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def acquire(self):
+        """Check out a connection, waiting up to ``timeout`` seconds when the pool is exhausted."""
+        deadline = None
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            self._checkouts += 1
+            while not self._idle and self._open >= self.max_size:
+                if deadline is None:
+                    self._waits += 1
+                    wait_started = time.monotonic()
+                    deadline = wait_started + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    self._wait_seconds += time.monotonic() - wait_started
+                    raise TimeoutError(f"No SQLite connection available within {self.timeout}s")
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+            if deadline is not None:
+                self._wait_seconds += time.monotonic() - wait_started
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+
+        try:
+            return self._create_connection()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, closing it instead when discarded or the pool is closed."""
+        if conn.in_transaction:
+            import sqlite3
+
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        with self._condition:
+            if discard or self._closed:
+                self._open -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection; uncommitted work is rolled back on exit."""
+        import sqlite3
+
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """Close idle connections; checked-out connections are closed when released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """Snapshot of pool usage counters for sizing decisions."""
+        with self._condition:
+            return {
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_seconds": round(self._wait_seconds, 6),
+                "open_connections": self._open,
+                "idle_connections": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+
+class SMTPConnectionPool:
+    """
+    Pool of long-lived, authenticated SMTP sessions.
+
+    Before a pooled session is reused it is checked without a round trip
+    (a readable idle socket means the server hung up or announced 421), and
+    sessions idle for longer than ``keepalive`` seconds are also probed with
+    NOOP; a session that fails either check is replaced by a fresh one.
+    Sends themselves are never retried, because a connection lost after the
+    DATA phase may already have delivered the message.
+    """
+
+    def __init__(self, host, port, username=None, password=None, use_starttls=True,
+                 max_size=4, timeout=5.0, keepalive=30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.max_size = max_size
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self._ssl_context = None
+        self._condition = threading.Condition()
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._stats = {"connects": 0, "reconnects": 0, "sent": 0, "waits": 0}
+
+    def _connect(self):
+        import smtplib
+        import ssl
+
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_starttls:
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context()
+                server.starttls(context=self._ssl_context)
+            if self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._condition:
+            self._stats["connects"] += 1
+        return server
+
+    def _is_alive(self, server, idle_seconds):
+        import select
+
+        if server.sock is None:
+            return False
+        try:
+            if select.select([server.sock], [], [], 0)[0]:
+                # Nothing is outstanding on an idle session, so readable means EOF or an unsolicited 421.
+                return False
+        except (OSError, ValueError):
+            return False
+        if idle_seconds < self.keepalive:
+            return True
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def acquire(self):
+        deadline = None
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("SMTP pool is closed")
+            while not self._idle and self._open >= self.max_size:
+                if deadline is None:
+                    self._stats["waits"] += 1
+                    deadline = time.monotonic() + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise TimeoutError(f"No SMTP session available within {self.timeout}s")
+                if self._closed:
+                    raise RuntimeError("SMTP pool is closed")
+            if self._idle:
+                server, last_used = self._idle.pop()
+            else:
+                server, last_used = None, None
+                self._open += 1
+
+        if server is not None:
+            if self._is_alive(server, time.monotonic() - last_used):
+                return server
+            self._close_quietly(server)
+            with self._condition:
+                self._stats["reconnects"] += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, server, discard=False):
+        """Return a session to the pool, closing it instead when discarded or the pool is closed."""
+        with self._condition:
+            discard = discard or self._closed
+            if discard:
+                self._open -= 1
+            else:
+                self._idle.append((server, time.monotonic()))
+            self._condition.notify()
+        if discard:
+            self._close_quietly(server)
+
+    @staticmethod
+    def _close_quietly(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def send(self, message):
+        """Send a message on a checked pooled session; failures are raised, not retried."""
+        import smtplib
+
+        server = self.acquire()
+        try:
+            server.send_message(message)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server rejected this message but the session itself is still usable.
+            self.release(server)
+            raise
+        except Exception:
+            self.release(server, discard=True)
+            raise
+        self.release(server)
+        with self._condition:
+            self._stats["sent"] += 1
+
+    def close(self):
+        """Close idle sessions; checked-out sessions are closed when released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for server, _last_used in idle:
+            self._close_quietly(server)
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update({"open_sessions": self._open, "idle_sessions": len(self._idle)})
+            return stats
+
+
+class ApiRequestBatcher:
+    """
+    Coalesce call_external_api payloads into batched POSTs.
+
+    Payloads are collected until ``max_batch_size`` items are waiting or the
+    oldest has lingered for ``linger_ms``, then sent as ``{"items": [...]}``
+    to the batch endpoint, which must answer with ``{"results": [...]}`` (or
+    a bare list) in the same order. Identical payloads already queued or in
+    flight share one future. Up to ``max_inflight_batches`` batches are sent
+    concurrently so collection and transmission overlap.
+    """
+
+    def __init__(self, processor, max_batch_size=None, linger_ms=None, endpoint=None, max_inflight_batches=None):
+        self.processor = processor
+        self.logger = processor.logger
+        settings = processor.settings
+        self.max_batch_size = max_batch_size or settings.api_batch_size
+        if linger_ms is None:
+            linger_ms = settings.api_batch_linger_ms
+        self.linger = linger_ms / 1000.0
+        self.endpoint = endpoint or settings.api_batch_endpoint
+        self.max_inflight_batches = max_inflight_batches or settings.api_batch_inflight
+
+        self._condition = threading.Condition()
+        self._pending = []
+        self._inflight = {}
+        self._collector = None
+        self._sender = None
+        self._closed = False
+        self._metrics = {
+            "batches_sent": 0,
+            "items_sent": 0,
+            "deduplicated": 0,
+            "failed_batches": 0,
+            "fill_ratio_total": 0.0,
+            "added_latency_total": 0.0,
+            "added_latency_max": 0.0,
+        }
+
+    def submit(self, payload):
+        """Queue a payload and return a Future resolving to its response (None on failure)."""
+        key = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("ApiRequestBatcher is closed")
+            future = self._inflight.get(key)
+            if future is not None:
+                self._metrics["deduplicated"] += 1
+                return future
+            future = self._inflight[key] = Future()
+            self._pending.append((key, payload, time.monotonic()))
+            if self._collector is None:
+                self._sender = ThreadPoolExecutor(
+                    max_workers=self.max_inflight_batches,
+                    thread_name_prefix="api-batch-sender",
+                )
+                self._collector = threading.Thread(target=self._collect, name="api-batch-collector", daemon=True)
+                self._collector.start()
+            self._condition.notify()
+            return future
+
+    def call(self, payload, timeout=None):
+        return self.submit(payload).result(timeout)
+
+    def _collect(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                deadline = self._pending[0][2] + self.linger
+                while len(self._pending) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            self._sender.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        dispatched_at = time.monotonic()
+        added_latencies = [dispatched_at - enqueued_at for _key, _payload, enqueued_at in batch]
+        results = [None] * len(batch)
+        failed = False
+        try:
+            response = self.processor.session.post(
+                self.endpoint,
+                headers=self.processor._api_headers(),
+                json={"items": [payload for _key, payload, _enqueued_at in batch]},
+                timeout=self.processor.request_timeout,
+            )
+            response.raise_for_status()
+            body = response.json()
+            batch_results = body.get("results") if isinstance(body, dict) else body
+            if not isinstance(batch_results, list) or len(batch_results) != len(batch):
+                raise ValueError(f"Batch endpoint returned {type(batch_results).__name__} for {len(batch)} items")
+            results = batch_results
+        except Exception as e:
+            failed = True
+            self.logger.error("Batched API request exception: %s", e)
+
+        with self._condition:
+            metrics = self._metrics
+            metrics["batches_sent"] += 1
+            metrics["items_sent"] += len(batch)
+            metrics["failed_batches"] += failed
+            metrics["fill_ratio_total"] += len(batch) / self.max_batch_size
+            metrics["added_latency_total"] += sum(added_latencies)
+            metrics["added_latency_max"] = max(metrics["added_latency_max"], max(added_latencies))
+            futures = [self._inflight.pop(key) for key, _payload, _enqueued_at in batch]
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def metrics(self):
+        """Batch fill ratio and queueing latency added by batching."""
+        with self._condition:
+            metrics = dict(self._metrics)
+            pending = len(self._pending)
+        batches = metrics.pop("batches_sent")
+        items = metrics.pop("items_sent")
+        fill_total = metrics.pop("fill_ratio_total")
+        latency_total = metrics.pop("added_latency_total")
+        latency_max = metrics.pop("added_latency_max")
+        metrics.update({
+            "batches_sent": batches,
+            "items_sent": items,
+            "pending": pending,
+            "avg_fill_ratio": round(fill_total / batches, 4) if batches else 0.0,
+            "avg_added_latency_ms": round(latency_total / items * 1000, 3) if items else 0.0,
+            "max_added_latency_ms": round(latency_max * 1000, 3),
+        })
+        return metrics
+
+    def close(self):
+        """Flush queued payloads and stop the background threads."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            collector, sender = self._collector, self._sender
+        if collector is not None:
+            collector.join()
+            sender.shutdown(wait=True)
+
+
+# Performance: fixed log-scale latency buckets (25us .. ~52s) keep observation O(log buckets) with no sample storage.
+_LATENCY_BUCKETS = tuple(0.000025 * 2 ** exponent for exponent in range(22))
+
+
+class LatencyHistogram:
+    """Bucketed latency histogram with call, error and byte counters for one method."""
+
+    __slots__ = ("bucket_counts", "count", "errors", "bytes", "total_seconds", "max_seconds")
+
     def __init__(self):
-        logging.basicConfig(level=logging.DEBUG)
+        self.bucket_counts = [0] * (len(_LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.bytes = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds, error=False, bytes_moved=0):
+        self.bucket_counts[bisect_left(_LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.errors += error
+        self.bytes += bytes_moved
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def percentile(self, fraction):
+        """Estimate a percentile by interpolating inside the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            if bucket_count and seen + bucket_count >= target:
+                lower = _LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = _LATENCY_BUCKETS[index] if index < len(_LATENCY_BUCKETS) else self.max_seconds
+                return min(lower + (upper - lower) * (target - seen) / bucket_count, self.max_seconds)
+            seen += bucket_count
+        return self.max_seconds
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "mean_ms": round(self.total_seconds / self.count * 1000, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 4),
+            "p99_ms": round(self.percentile(0.99) * 1000, 4),
+            "max_ms": round(self.max_seconds * 1000, 4),
+        }
+
+
+class ProcessorMetrics:
+    """
+    Per-method latency histograms for a DataProcessor.
+
+    ``profile_sample_rate`` (env ``PROCESSOR_PROFILE_SAMPLE_RATE``) runs that
+    fraction of instrumented calls under cProfile and passes
+    ``(method, pstats.Stats)`` to ``profiler_hook``; the default hook logs the
+    top functions at DEBUG.
+    """
+
+    def __init__(self, logger, profile_sample_rate=None, profiler_hook=None):
+        self.logger = logger
+        if profile_sample_rate is None:
+            profile_sample_rate = get_settings().profile_sample_rate
+        self.profile_sample_rate = profile_sample_rate
+        self.profiler_hook = profiler_hook or self._log_profile
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _frames(self):
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def mark_failed(self):
+        """Flag the innermost instrumented call on this thread as an error."""
+        frames = self._frames()
+        if frames:
+            frames[-1][0] = True
+
+    def add_bytes(self, count):
+        """Attribute ``count`` bytes sent or received to the innermost instrumented call."""
+        frames = self._frames()
+        if frames:
+            frames[-1][1] += count
+
+    def observe(self, method, seconds, error=False, bytes_moved=0):
+        with self._lock:
+            histogram = self._histograms.get(method)
+            if histogram is None:
+                histogram = self._histograms[method] = LatencyHistogram()
+            histogram.observe(seconds, error, bytes_moved)
+
+    def call(self, method, func, *args, **kwargs):
+        """Run ``func`` as an instrumented call of ``method``."""
+        frames = self._frames()
+        frame = [False, 0]
+        frames.append(frame)
+        profiler = None
+        if self.profile_sample_rate and not getattr(self._local, "profiling", False):
+            import random
+
+            if random.random() < self.profile_sample_rate:
+                import cProfile
+
+                profiler = cProfile.Profile()
+                self._local.profiling = True
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                return profiler.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        except BaseException:
+            frame[0] = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            frames.pop()
+            self.observe(method, elapsed, frame[0], frame[1])
+            if profiler is not None:
+                self._local.profiling = False
+                self._report_profile(method, profiler)
+
+    def _report_profile(self, method, profiler):
+        import pstats
+
+        try:
+            self.profiler_hook(method, pstats.Stats(profiler))
+        except Exception as e:
+            self.logger.warning("Profiler hook failed for %s: %s", method, e)
+
+    def _log_profile(self, method, stats):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            import io
+
+            buffer = io.StringIO()
+            stats.stream = buffer
+            stats.sort_stats("cumulative").print_stats(10)
+            self.logger.debug("Sampled profile for %s:\n%s", method, buffer.getvalue())
+
+    def snapshot(self):
+        """Raw histogram state per method (bucket counts included) for exporters."""
+        with self._lock:
+            return {
+                method: {
+                    "buckets": list(histogram.bucket_counts),
+                    "sum_seconds": histogram.total_seconds,
+                    **histogram.summary(),
+                }
+                for method, histogram in self._histograms.items()
+            }
+
+    def summary(self):
+        with self._lock:
+            return {method: histogram.summary() for method, histogram in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def export_metrics_json(snapshot):
+    return json.dumps(
+        {method: {key: value for key, value in data.items() if key not in ("buckets", "sum_seconds")}
+         for method, data in snapshot.items()},
+        indent=2,
+        sort_keys=True,
+    )
+
+
+def export_metrics_prometheus(snapshot):
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = [
+        "# HELP dataprocessor_call_duration_seconds DataProcessor method latency.",
+        "# TYPE dataprocessor_call_duration_seconds histogram",
+    ]
+    for method, data in sorted(snapshot.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(_LATENCY_BUCKETS, data["buckets"]):
+            cumulative += bucket_count
+            lines.append(f'dataprocessor_call_duration_seconds_bucket{{method="{method}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'dataprocessor_call_duration_seconds_bucket{{method="{method}",le="+Inf"}} {data["count"]}')
+        lines.append(f'dataprocessor_call_duration_seconds_sum{{method="{method}"}} {data["sum_seconds"]:.6f}')
+        lines.append(f'dataprocessor_call_duration_seconds_count{{method="{method}"}} {data["count"]}')
+    for name, key, help_text in (
+        ("dataprocessor_call_errors_total", "errors", "Failed DataProcessor calls."),
+        ("dataprocessor_bytes_total", "bytes", "Bytes sent or received by DataProcessor calls."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for method, data in sorted(snapshot.items()):
+            lines.append(f'{name}{{method="{method}"}} {data[key]}')
+    return "\n".join(lines) + "\n"
+
+
+# Exporters are looked up by name in DataProcessor.export_metrics; register additional formats here.
+METRIC_EXPORTERS = {
+    "json": export_metrics_json,
+    "prometheus": export_metrics_prometheus,
+}
+
+
+def _instrumented(method):
+    """Time a DataProcessor method through its ProcessorMetrics."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self.metrics.call(name, method, self, *args, **kwargs)
+
+    return wrapper
+
+
+class _CsvExportWriter:
+    def __init__(self, path):
+        import csv
+
+        self._handle = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(_USER_DATA_COLUMNS)
+
+    def write_batch(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._handle.close()
+
+
+class _JsonLinesExportWriter:
+    def __init__(self, path):
+        self._handle = open(path, "w", encoding="utf-8")
+
+    def write_batch(self, rows):
+        self._handle.write("".join(
+            json.dumps(dict(zip(_USER_DATA_COLUMNS, row)), default=str) + "\n" for row in rows
+        ))
+
+    def close(self):
+        self._handle.close()
+
+
+class _ParquetExportWriter:
+    """Appends one row group per batch through pyarrow's ParquetWriter."""
+
+    def __init__(self, path):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pa = pyarrow
+        self._schema = pyarrow.schema(
+            [("id", pyarrow.int64())] + [(column, pyarrow.string()) for column in _USER_DATA_COLUMNS[1:]]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write_batch(self, rows):
+        pa = self._pa
+        columns = list(zip(*rows))
+        arrays = [pa.array(columns[0], type=pa.int64())] + [
+            pa.array([None if value is None else str(value) for value in column], type=pa.string())
+            for column in columns[1:]
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+_EXPORT_WRITERS = {
+    "csv": _CsvExportWriter,
+    "jsonl": _JsonLinesExportWriter,
+    "parquet": _ParquetExportWriter,
+}
+_EXPORT_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+# Keyset pages span this many fetchmany batches before the next "id > last_id" query.
+_EXPORT_PAGE_BATCHES = 10
+_EXPORT_SELECT_SQL = f"SELECT {', '.join(_USER_DATA_COLUMNS)} FROM user_data WHERE id > ?"
+_EXPORT_END = object()
+
+
+def _iter_user_rows(conn, batch_size, min_id=None, max_id=None):
+    """Yield user_data rows in id order, ``batch_size`` at a time, via keyset pagination."""
+    page_size = batch_size * _EXPORT_PAGE_BATCHES
+    last_id = -(2 ** 63) if min_id is None else min_id - 1
+    while True:
+        if max_id is None:
+            cursor = conn.execute(f"{_EXPORT_SELECT_SQL} ORDER BY id LIMIT ?", (last_id, page_size))
+        else:
+            cursor = conn.execute(f"{_EXPORT_SELECT_SQL} AND id <= ? ORDER BY id LIMIT ?", (last_id, max_id, page_size))
+        fetched = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            fetched += len(rows)
+            last_id = rows[-1][0]
+            yield rows
+        if fetched < page_size:
+            return
+
+
+class DataProcessor:
+    def __init__(self, settings=None):
+        # Logging configuration is left to the application (see main); the library only logs.
         self.logger = logging.getLogger(__name__)
 
         # Security fix: keep sensitive values out of logs while still confirming configuration.
         self.logger.debug("DataProcessor initialized with sanitized configuration")
 
-        self.api_key = API_KEY
-        self.db_path = os.getenv("APP_DB_PATH", "app_data.db")
-        self.aws_region = os.getenv("AWS_REGION", "us-east-1")
-        self._email_sender = os.getenv("SMTP_SENDER", "notifications@company.com")
+        self.settings = settings = settings or get_settings()
+        self.api_key = settings.api_key
+        self.api_base_url = settings.api_base_url
+        self.webhook_endpoint = settings.webhook_endpoint
+        self.db_path = settings.db_path
+        self.aws_region = settings.aws_region
+        self._email_sender = settings.smtp_sender
+        self.s3_endpoint_url = settings.s3_endpoint_url
+        self.s3_part_size_mb = settings.s3_part_size_mb
+        self.s3_max_concurrency = settings.s3_max_concurrency
 
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': 'DataProcessor/1.1'})
+        # Performance: the requests.Session is built on first HTTP call (see ``session``).
+        self._session = None
         # Security fix: rely on certificate validation (verify=True by default) to prevent MITM.
-        self.request_timeout = float(os.getenv("PROCESSOR_REQUEST_TIMEOUT", "5.0"))
-    
+        self.request_timeout = settings.request_timeout
+
+        # Performance: reuse prepared SQLite connections instead of reconnecting per call.
+        self.db_pool_size = settings.db_pool_size
+        self.db_pool_timeout = settings.db_pool_timeout
+        self._db_pool = None
+        self._resource_lock = threading.Lock()
+        self._cached_api_headers = None
+        self._api_batcher = None
+        self._smtp_pool = None
+        self.webhook_queue_path = settings.webhook_queue_path
+        self._webhook_queue = None
+        self._webhook_workers = None
+        self._webhook_engine = None
+        self.smtp_password = settings.smtp_password
+        # Performance: optional ingest mode that hashes sensitive columns in Python before INSERT.
+        self.prehash_sensitive = settings.prehash_sensitive
+        self.prehash_workers = settings.prehash_workers
+        self.export_batch_size = settings.export_batch_size
+        # Performance: per-method latency/error/byte histograms; see metrics_summary and export_metrics.
+        self.metrics = ProcessorMetrics(self.logger)
+
+    def metrics_summary(self):
+        """p50/p99/mean/max latency (ms), call, error and byte counts per instrumented method."""
+        return self.metrics.summary()
+
+    def export_metrics(self, fmt="prometheus"):
+        """Render metrics with a registered exporter ("prometheus" or "json" by default)."""
+        try:
+            exporter = METRIC_EXPORTERS[fmt]
+        except KeyError:
+            raise ValueError(f"Unknown metrics format: {fmt}") from None
+        return exporter(self.metrics.snapshot())
+
+    @property
+    def session(self):
+        """Shared requests.Session, created (and requests imported) on first use."""
+        session = self._session
+        if session is None:
+            with self._resource_lock:
+                if self._session is None:
+                    import requests
+
+                    self._session = requests.Session()
+                    self._session.headers.update({'User-Agent': 'DataProcessor/1.1'})
+                session = self._session
+        return session
+
+    @_instrumented
     def connect_to_database(self):
-        """Connect to database using a configurable path and secure handling."""
+        """Open a standalone prepared connection; prefer ``db_pool`` for request-path work."""
+        import sqlite3
+
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            conn.create_function("hash_sensitive", 1, _hash_sensitive_value, deterministic=True)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_data (
-                    id INTEGER PRIMARY KEY,
-                    username TEXT,
-                    password TEXT,
-                    credit_card TEXT,
-                    ssn TEXT,
-                    created_at TIMESTAMP
-                )
-            """)
-            cursor.executescript("""
-                CREATE TRIGGER IF NOT EXISTS user_data_hash_insert
-                AFTER INSERT ON user_data
-                WHEN
-                    (NEW.password IS NOT NULL AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')) OR
-                    (NEW.credit_card IS NOT NULL AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')) OR
-                    (NEW.ssn IS NOT NULL AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*'))
-                BEGIN
-                    UPDATE user_data
-                    SET password = CASE
-                            WHEN NEW.password IS NOT NULL AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')
-                                THEN hash_sensitive(NEW.password)
-                            ELSE password
-                        END,
-                        credit_card = CASE
-                            WHEN NEW.credit_card IS NOT NULL AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')
-                                THEN hash_sensitive(NEW.credit_card)
-                            ELSE credit_card
-                        END,
-                        ssn = CASE
-                            WHEN NEW.ssn IS NOT NULL AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*')
-                                THEN hash_sensitive(NEW.ssn)
-                            ELSE ssn
-                        END
-                    WHERE id = NEW.id;
-                END;
-                CREATE TRIGGER IF NOT EXISTS user_data_hash_update
-                AFTER UPDATE ON user_data
-                WHEN
-                    (NEW.password IS NOT NULL AND NEW.password != OLD.password AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')) OR
-                    (NEW.credit_card IS NOT NULL AND NEW.credit_card != OLD.credit_card AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')) OR
-                    (NEW.ssn IS NOT NULL AND NEW.ssn != OLD.ssn AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*'))
-                BEGIN
-                    UPDATE user_data
-                    SET password = CASE
-                            WHEN NEW.password IS NOT NULL AND (length(NEW.password) != 64 OR NEW.password NOT GLOB '[0-9a-f]*')
-                                THEN hash_sensitive(NEW.password)
-                            ELSE password
-                        END,
-                        credit_card = CASE
-                            WHEN NEW.credit_card IS NOT NULL AND (length(NEW.credit_card) != 64 OR NEW.credit_card NOT GLOB '[0-9a-f]*')
-                                THEN hash_sensitive(NEW.credit_card)
-                            ELSE credit_card
-                        END,
-                        ssn = CASE
-                            WHEN NEW.ssn IS NOT NULL AND (length(NEW.ssn) != 64 OR NEW.ssn NOT GLOB '[0-9a-f]*')
-                                THEN hash_sensitive(NEW.ssn)
-                            ELSE ssn
-                        END
-                    WHERE id = NEW.id;
-                END;
-            """)
-            conn.commit()
-            return conn, cursor
+            _prepare_connection(conn)
+            _ensure_schema(conn)
+            return conn, conn.cursor()
         except Exception as e:
-            self.logger.error(f"Database connection failed: {str(e)} | Database path: {self.db_path}")
+            self.metrics.mark_failed()
+            self.logger.error("Database connection failed: %s | Database path: %s", e, self.db_path)
             return None, None
-    
+
+    @property
+    def db_pool(self):
+        """Connection pool for ``db_path``, rebuilt if the path changes after construction."""
+        with self._resource_lock:
+            if self._db_pool is None or self._db_pool.db_path != self.db_path:
+                if self._db_pool is not None:
+                    self._db_pool.close()
+                self._db_pool = SQLiteConnectionPool(
+                    self.db_path,
+                    max_size=self.db_pool_size,
+                    timeout=self.db_pool_timeout,
+                )
+            return self._db_pool
+
+    def pool_stats(self):
+        """Expose connection pool counters (checkouts, waits, open connections)."""
+        with self._resource_lock:
+            if self._db_pool is None:
+                return {
+                    "checkouts": 0,
+                    "waits": 0,
+                    "wait_seconds": 0.0,
+                    "open_connections": 0,
+                    "idle_connections": 0,
+                    "in_use": 0,
+                    "max_size": self.db_pool_size,
+                }
+            return self._db_pool.stats()
+
+    def close(self):
+        """Stop background workers, flush batched API calls and release pooled connections."""
+        with self._resource_lock:
+            batcher, self._api_batcher = self._api_batcher, None
+            smtp_pool, self._smtp_pool = self._smtp_pool, None
+            workers, self._webhook_workers = self._webhook_workers, None
+            engine, self._webhook_engine = self._webhook_engine, None
+            webhook_queue, self._webhook_queue = self._webhook_queue, None
+            session, self._session = self._session, None
+        if workers is not None:
+            workers.stop()
+        if engine is not None:
+            engine.close()
+        if webhook_queue is not None:
+            webhook_queue.close()
+        if batcher is not None:
+            batcher.close()
+        if smtp_pool is not None:
+            smtp_pool.close()
+        if session is not None:
+            session.close()
+        with self._resource_lock:
+            if self._db_pool is not None:
+                self._db_pool.close()
+                self._db_pool = None
+
+    @_instrumented
     def fetch_user_data(self, user_id):
         """Fetch user data using parameterized queries to avoid SQL injection."""
-        conn, cursor = self.connect_to_database()
-        if not cursor:
-            return None
-        
         query = "SELECT * FROM user_data WHERE id = ?"
         self.logger.debug("Executing parameterized query for user lookup")
         
         try:
-            cursor.execute(query, (user_id,))
-            result = cursor.fetchone()
-            conn.close()
-            return result
+            with self.db_pool.connection() as conn:
+                row = conn.execute(query, (user_id,)).fetchone()
+            if row is not None:
+                self.metrics.add_bytes(sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in row))
+            return row
         except Exception as e:
-            self.logger.error(f"Query failed: {e}")
+            self.metrics.mark_failed()
+            self.logger.error("Query failed: %s", e)
             return None
     
+    def fetch_users_bulk(self, user_ids, chunk_size=_SQLITE_MAX_VARIABLES):
+        """Fetch many users with chunked ``IN (...)`` queries; returns a dict keyed by id."""
+        unique_ids = list(dict.fromkeys(user_ids))
+        chunk_size = max(1, min(int(chunk_size), _SQLITE_MAX_VARIABLES))
+        self.logger.debug("Executing chunked parameterized query for bulk user lookup")
+
+        results = {}
+        try:
+            with self.db_pool.connection() as conn:
+                for start in range(0, len(unique_ids), chunk_size):
+                    chunk = unique_ids[start:start + chunk_size]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    query = f"SELECT * FROM user_data WHERE id IN ({placeholders})"
+                    for row in conn.execute(query, chunk):
+                        results[row[0]] = row
+            return results
+        except Exception as e:
+            self.logger.error("Bulk query failed: %s", e)
+            return None
+
+    def upsert_users_bulk(self, rows, prehash=None):
+        """
+        Insert or update many users in a single transaction.
+
+        ``rows`` may be mappings keyed by column name or sequences in
+        ``_USER_DATA_COLUMNS`` order. Sensitive columns are hashed by the
+        table triggers, or in bulk beforehand when ``prehash`` (default:
+        ``prehash_sensitive``) is enabled. Returns the number of rows written,
+        or None on failure.
+        """
+        if prehash is None:
+            prehash = self.prehash_sensitive
+
+        def _as_params(row):
+            if isinstance(row, dict):
+                return tuple(row.get(column) for column in _USER_DATA_COLUMNS)
+            params = tuple(row)
+            if len(params) != len(_USER_DATA_COLUMNS):
+                raise ValueError(f"Expected {len(_USER_DATA_COLUMNS)} values per row, got {len(params)}")
+            return params
+
+        try:
+            params = (_as_params(row) for row in rows)
+            if prehash:
+                params = hash_sensitive_rows(params, workers=self.prehash_workers)
+            with self.db_pool.connection() as conn:
+                cursor = conn.executemany(_UPSERT_USER_SQL, params)
+                conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            self.logger.error("Bulk upsert failed: %s", e)
+            return None
+
+    def iter_user_batches(self, batch_size=None):
+        """
+        Stream the whole user_data table as lists of rows in id order.
+
+        Uses keyset pagination on ``id`` (no OFFSET scans) and ``fetchmany``,
+        so memory is bounded by ``batch_size`` regardless of table size.
+        Sensitive columns are returned exactly as stored, i.e. hashed.
+        """
+        batch_size = batch_size or self.export_batch_size
+        with self.db_pool.connection() as conn:
+            yield from _iter_user_rows(conn, batch_size)
+
+    def _read_only_connection(self):
+        import sqlite3
+
+        path = quote(os.path.abspath(self.db_path))
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _parallel_user_batches(self, batch_size, readers):
+        """Read contiguous id ranges on separate read-only connections, yielding batches in id order."""
+        with self.db_pool.connection() as conn:
+            low, high = conn.execute("SELECT MIN(id), MAX(id) FROM user_data").fetchone()
+        if low is None:
+            return
+        span = (high - low) // readers + 1
+        ranges = [(start, min(start + span - 1, high)) for start in range(low, high + 1, span)]
+        # Two batches of read-ahead per range keeps memory flat while the writer drains range by range.
+        queues = [queue.Queue(maxsize=2) for _ in ranges]
+        stop = threading.Event()
+
+        def _put(batches, item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _read_range(batches, range_low, range_high):
+            conn = None
+            try:
+                conn = self._read_only_connection()
+                for rows in _iter_user_rows(conn, batch_size, range_low, range_high):
+                    if not _put(batches, rows):
+                        return
+                _put(batches, _EXPORT_END)
+            except Exception as e:
+                _put(batches, e)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+        threads = [
+            threading.Thread(target=_read_range, args=(batches, *bounds), name="user-export-reader", daemon=True)
+            for batches, bounds in zip(queues, ranges)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for batches in queues:
+                while True:
+                    item = batches.get()
+                    if item is _EXPORT_END:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    @_instrumented
+    def export_users(self, path, fmt=None, batch_size=None, readers=1):
+        """
+        Export user_data to CSV, JSON-lines or Parquet, writing batch by batch.
+
+        ``fmt`` defaults to the file extension (.csv, .jsonl/.ndjson, .parquet;
+        Parquet needs pyarrow). With ``readers`` > 1, id ranges are read in
+        parallel on read-only connections and still written in id order.
+        Hashed columns are exported as stored. Returns export stats, or None
+        on failure.
+        """
+        fmt = fmt or _EXPORT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if fmt not in _EXPORT_WRITERS:
+            raise ValueError(f"Unsupported export format for {path}: {fmt}")
+        batch_size = batch_size or self.export_batch_size
+
+        started = time.perf_counter()
+        rows_written = batches_written = 0
+        try:
+            if readers > 1 and self.db_path != ":memory:":
+                batches = self._parallel_user_batches(batch_size, readers)
+            else:
+                batches = self.iter_user_batches(batch_size)
+            writer = _EXPORT_WRITERS[fmt](path)
+            try:
+                for rows in batches:
+                    writer.write_batch(rows)
+                    rows_written += len(rows)
+                    batches_written += 1
+            finally:
+                batches.close()
+                writer.close()
+        except Exception as e:
+            self.metrics.mark_failed()
+            self.logger.error("User export failed: %s | Path: %s", e, path)
+            return None
+
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(path)
+        self.metrics.add_bytes(size)
+        self.logger.info("Exported %d user row(s) to %s", rows_written, path)
+        return {
+            "path": path,
+            "format": fmt,
+            "rows": rows_written,
+            "batches": batches_written,
+            "bytes": size,
+            "seconds": round(elapsed, 4),
+            "rows_per_sec": round(rows_written / elapsed) if elapsed > 0 else rows_written,
+        }
+
+    def _api_headers(self):
+        # Performance: build the auth headers once per API key rather than per request.
+        if self._cached_api_headers is None or self._cached_api_headers[0] != self.api_key:
+            self._cached_api_headers = (self.api_key, {
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': 'application/json',
+            })
+        return self._cached_api_headers[1]
+
+    @property
+    def api_batcher(self):
+        """Lazily started ApiRequestBatcher shared by call_external_api_batched callers."""
+        with self._resource_lock:
+            if self._api_batcher is None:
+                self._api_batcher = ApiRequestBatcher(self)
+            return self._api_batcher
+
+    def call_external_api_batched(self, data, timeout=None):
+        """Like call_external_api, but coalesced with concurrent callers into batch requests."""
+        if not self.api_key:
+            self.logger.warning("Skipping API call because PROCESSOR_API_KEY is not configured")
+            return None
+        return self.api_batcher.call(data, timeout=timeout)
+
+    @_instrumented
     def call_external_api(self, data):
         """Make authenticated API calls with TLS validation and sane timeouts."""
         if not self.api_key:
             self.logger.warning("Skipping API call because PROCESSOR_API_KEY is not configured")
             return None
 
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json',
-        }
-        
         try:
             response = self.session.post(
-                f"{API_BASE_URL}/process",
-                headers=headers,
+                f"{self.api_base_url}/process",
+                headers=self._api_headers(),
                 json=data,
                 timeout=self.request_timeout
             )
             
+            self.metrics.add_bytes(len(response.request.body or b"") + len(response.content))
             response.raise_for_status()
             return response.json()
 
         except Exception as e:
-            self.logger.error(f"API request exception: {str(e)}")
+            self.metrics.mark_failed()
+            self.logger.error("API request exception: %s", e)
             return None
     
-    def upload_to_cloud(self, file_path, bucket_name="company-sensitive-data"):
-        """Upload files to cloud storage using environment-managed AWS credentials."""
-        import boto3
-        
+    def _s3_client(self):
         client_args = {'region_name': self.aws_region}
+        settings = self.settings
         # Security fix: rely on AWS default credential provider chain when explicit keys are absent.
-        if AWS_ACCESS_KEY and AWS_SECRET_KEY:
+        if settings.aws_access_key and settings.aws_secret_key:
             client_args.update({
-                'aws_access_key_id': AWS_ACCESS_KEY,
-                'aws_secret_access_key': AWS_SECRET_KEY,
+                'aws_access_key_id': settings.aws_access_key,
+                'aws_secret_access_key': settings.aws_secret_key,
             })
-            if AWS_SESSION_TOKEN:
-                client_args['aws_session_token'] = AWS_SESSION_TOKEN
+            if settings.aws_session_token:
+                client_args['aws_session_token'] = settings.aws_session_token
+        if self.s3_endpoint_url:
+            client_args['endpoint_url'] = self.s3_endpoint_url
+        return _get_s3_client(**client_args)
+
+    def _transfer_config(self, part_size_mb=None, max_concurrency=None):
+        from boto3.s3.transfer import TransferConfig
 
-        s3_client = boto3.client('s3', **client_args)
+        part_size = int((part_size_mb or self.s3_part_size_mb) * 1024 * 1024)
+        return TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=max_concurrency or self.s3_max_concurrency,
+            use_threads=True,
+        )
+
+    @_instrumented
+    def upload_to_cloud(self, file_path, bucket_name="company-sensitive-data"):
+        """Upload files to cloud storage using environment-managed AWS credentials."""
+        s3_client = self._s3_client()
         
         try:
             s3_client.upload_file(
                 file_path, 
                 bucket_name, 
-                os.path.basename(file_path)
+                os.path.basename(file_path),
+                Config=self._transfer_config(),
             )
             
-            self.logger.info(f"File uploaded successfully to s3://{bucket_name}/{os.path.basename(file_path)}")
+            self.metrics.add_bytes(os.path.getsize(file_path))
+            self.logger.info("File uploaded successfully to s3://%s/%s", bucket_name, os.path.basename(file_path))
             return True
             
         except Exception as e:
-            self.logger.error(f"S3 upload failed: {str(e)} | Bucket: {bucket_name}")
+            self.metrics.mark_failed()
+            self.logger.error("S3 upload failed: %s | Bucket: %s", e, bucket_name)
             return False
+
+    def upload_many(
+        self,
+        paths,
+        bucket_name="company-sensitive-data",
+        concurrency=8,
+        part_size_mb=None,
+        max_concurrency=None,
+        retries=3,
+        progress=None,
+        key=None,
+    ):
+        """
+        Upload many files in parallel through the cached S3 client.
+
+        Object keys come from ``key(path)`` when given; by default they are the
+        paths relative to the files' common directory (``/``-separated), so
+        same-named files in different directories do not overwrite each other
+        and a single directory uploads under the bare file names. A path listed
+        twice is uploaded once; two different files mapping to one key raise
+        ValueError before anything is sent.
+
+        Each file is retried up to ``retries`` times with exponential backoff.
+        ``progress(path, bytes_sent, total_bytes)`` is called as parts are sent.
+        Returns an aggregate report with per-file results keyed by object key.
+        """
+        unique = {}
+        for path in paths:
+            unique.setdefault(os.path.abspath(path), path)
+        if key is None and unique:
+            base = os.path.commonpath([os.path.dirname(path) for path in unique])
+
+            def key(path):
+                return os.path.relpath(os.path.abspath(path), base).replace(os.sep, "/")
+
+        uploads = {}
+        for path in unique.values():
+            object_key = key(path)
+            if object_key in uploads:
+                raise ValueError(f"{uploads[object_key]} and {path} would both upload to key {object_key!r}")
+            uploads[object_key] = path
+
+        s3_client = self._s3_client()
+        config = self._transfer_config(part_size_mb, max_concurrency)
+
+        def _upload_one(item):
+            object_key, path = item
+            started = time.perf_counter()
+            result = {"path": path, "bytes": 0, "attempts": 0, "ok": False, "error": None}
+            try:
+                total = result["bytes"] = os.path.getsize(path)
+            except OSError as e:
+                # A missing or unreadable file fails on its own without aborting the other uploads.
+                result["error"] = str(e)
+                result["seconds"] = round(time.perf_counter() - started, 4)
+                self.logger.warning("S3 upload skipped for %s: %s", path, e)
+                return object_key, result
+            for attempt in range(retries + 1):
+                result["attempts"] = attempt + 1
+                sent = [0]
+
+                def _callback(chunk, sent=sent):
+                    sent[0] += chunk
+                    if progress is not None:
+                        progress(path, sent[0], total)
+
+                try:
+                    s3_client.upload_file(path, bucket_name, object_key, Config=config, Callback=_callback)
+                    result["ok"] = True
+                    result["error"] = None
+                    break
+                except Exception as e:
+                    result["error"] = str(e)
+                    self.logger.warning("S3 upload attempt %d failed for %s: %s", attempt + 1, path, e)
+                    if attempt < retries:
+                        time.sleep(min(0.5 * 2 ** attempt, 8.0))
+            result["seconds"] = round(time.perf_counter() - started, 4)
+            return object_key, result
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="s3-upload") as executor:
+            results = dict(executor.map(_upload_one, uploads.items()))
+        elapsed = time.perf_counter() - started
+
+        uploaded_bytes = sum(result["bytes"] for result in results.values() if result["ok"])
+        failed = [object_key for object_key, result in results.items() if not result["ok"]]
+        if failed:
+            self.logger.error("S3 bulk upload finished with %d failure(s) | Bucket: %s", len(failed), bucket_name)
+        else:
+            self.logger.info("Uploaded %d file(s) to s3://%s/", len(results), bucket_name)
+        return {
+            "files": len(results),
+            "succeeded": len(results) - len(failed),
+            "failed": failed,
+            "bytes": uploaded_bytes,
+            "seconds": round(elapsed, 4),
+            "throughput_mb_s": round(uploaded_bytes / (1024 * 1024) / elapsed, 3) if elapsed > 0 else 0.0,
+            "results": results,
+        }
     
-    def send_notification_email(self, recipient, subject, body):
-        """Send notification email using STARTTLS and environment-sourced credentials."""
-        import smtplib
+    @property
+    def smtp_pool(self):
+        """Lazily created pool of authenticated SMTP sessions."""
+        with self._resource_lock:
+            if self._smtp_pool is None:
+                self._smtp_pool = SMTPConnectionPool(
+                    self.settings.smtp_server,
+                    self.settings.smtp_port,
+                    username=self._email_sender,
+                    password=self.smtp_password,
+                    max_size=self.settings.smtp_pool_size,
+                    timeout=self.request_timeout,
+                )
+            return self._smtp_pool
+
+    def _build_message(self, recipient, subject, body):
         from email.mime.text import MIMEText
-        
-        smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        sender_email = self._email_sender
-        if not SMTP_PASSWORD:
+
+        message = MIMEText(body)
+        message['From'] = self._email_sender
+        message['To'] = recipient
+        message['Subject'] = subject
+        return message
+
+    @_instrumented
+    def send_notification_email(self, recipient, subject, body):
+        """Send notification email over a pooled STARTTLS session with environment-sourced credentials."""
+        if not self.smtp_password:
             self.logger.warning("SMTP password missing; email will not be sent")
             return False
         
         try:
-            context = ssl.create_default_context()
-            with smtplib.SMTP(smtp_server, smtp_port, timeout=self.request_timeout) as server:
-                server.starttls(context=context)
-                server.login(sender_email, SMTP_PASSWORD)
-                
-                message = MIMEText(body)
-                message['From'] = sender_email
-                message['To'] = recipient
-                message['Subject'] = subject
-                
-                server.send_message(message)
-            
-                self.logger.info(f"Email sent to {recipient}")
-                return True
+            message = self._build_message(recipient, subject, body)
+            self.smtp_pool.send(message)
+            self.metrics.add_bytes(len(message.as_bytes()))
+            self.logger.info("Email sent to %s", recipient)
+            return True
             
         except Exception as e:
-            self.logger.error(f"Email failed: {str(e)}")
+            self.metrics.mark_failed()
+            self.logger.error("Email failed: %s", e)
             return False
-    
+
+    def send_notifications_bulk(self, messages):
+        """
+        Send ``(recipient, subject, body)`` tuples, reusing one authenticated session.
+
+        Returns a list of booleans in message order.
+        """
+        if not self.smtp_password:
+            self.logger.warning("SMTP password missing; email will not be sent")
+            return [False for _ in messages]
+
+        results = []
+        pool = self.smtp_pool
+        for recipient, subject, body in messages:
+            try:
+                pool.send(self._build_message(recipient, subject, body))
+                results.append(True)
+            except Exception as e:
+                self.logger.error("Email failed: %s", e)
+                results.append(False)
+        self.logger.info("Sent %d of %d notification email(s)", sum(results), len(results))
+        return results
+
+    def _validate_webhook(self, webhook_data):
+        """Return ``(user_id, action, None)`` for a supported payload or ``(None, None, ignored_result)``."""
+        user_id = webhook_data.get('user_id')
+        action = webhook_data.get('action')
+
+        if action not in {"delete_user", "update_user"}:
+            self.logger.warning("Unsupported webhook action: %s", action)
+            return None, None, {"status": "ignored", "reason": "invalid action"}
+
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            self.logger.warning("Webhook payload missing valid user_id")
+            return None, None, {"status": "ignored", "reason": "invalid user_id"}
+        return user_id, action, None
+
+    def _delete_user_record(self, user_id):
+        with self.db_pool.connection() as conn:
+            conn.execute("DELETE FROM user_data WHERE id = ?", (user_id,))
+            conn.commit()
+        self.logger.info("Deleted user %s via webhook request", user_id)
+
+    def _deliver_webhook(self, webhook_data, idempotency_key=None):
+        """Apply and forward a webhook, raising on delivery failure so callers can retry."""
+        user_id, action, ignored = self._validate_webhook(webhook_data)
+        if ignored:
+            return ignored
+
+        if action == 'delete_user':
+            self._delete_user_record(user_id)
+        return self._forward_webhook(webhook_data, idempotency_key)
+
+    def _forward_webhook(self, webhook_data, idempotency_key=None):
+        response = self.session.post(
+            self.webhook_endpoint,
+            json=webhook_data,
+            headers={'Idempotency-Key': idempotency_key} if idempotency_key else None,
+            timeout=self.request_timeout
+        )
+        self.metrics.add_bytes(len(response.request.body or b"") + len(response.content))
+        response.raise_for_status()
+
+        return {"status": "processed", "webhook_response": response.status_code}
+
+    @_instrumented
     def process_webhook_data(self, webhook_data):
         """Process inbound webhook data with basic validation and sanitized SQL."""
         
         try:
-            user_id = webhook_data.get('user_id')
-            action = webhook_data.get('action')
+            return self._deliver_webhook(webhook_data)
             
-            if action not in {"delete_user", "update_user"}:
-                self.logger.warning(f"Unsupported webhook action: {action}")
-                return {"status": "ignored", "reason": "invalid action"}
+        except Exception as e:
+            self.metrics.mark_failed()
+            self.logger.error("Webhook processing failed: %s", e)
+            return {"status": "error", "message": str(e)}
+
+    @property
+    def webhook_engine(self):
+        """Lazily created ShardedWebhookEngine (worker processes plus one SQLite writer)."""
+        with self._resource_lock:
+            if self._webhook_engine is None:
+                self._webhook_engine = ShardedWebhookEngine(self)
+            return self._webhook_engine
+
+    def process_webhooks_sharded(self, webhooks):
+        """
+        Process many webhooks across worker processes partitioned by user_id.
+
+        Row changes are group-committed by a single writer instead of one
+        transaction per webhook. Each webhook is forwarded only after its own
+        change has committed and before the same user's next change commits
+        (a failed change is not forwarded); unlike process_webhook_data,
+        other users' changes from the same call may already be committed.
+        Results come back in input order. Tune with
+        PROCESSOR_WEBHOOK_SHARDS, PROCESSOR_WEBHOOK_SHARD_LANES,
+        APP_WRITE_BATCH_SIZE and APP_WRITE_FLUSH_MS,
+        and read commits/sec and lock wait from ``webhook_engine.metrics()``.
+        """
+        return self.webhook_engine.process(webhooks)
+
+    @property
+    def webhook_queue(self):
+        """Lazily opened durable webhook queue at ``webhook_queue_path``."""
+        with self._resource_lock:
+            if self._webhook_queue is None:
+                # Leave room for a full claimed batch of slow deliveries before entries are reclaimed.
+                visibility_timeout = max(60.0, 2 * self.settings.webhook_batch_size * self.request_timeout)
+                self._webhook_queue = WebhookQueue(self.webhook_queue_path, visibility_timeout=visibility_timeout)
+            return self._webhook_queue
+
+    def enqueue_webhook(self, webhook_data):
+        """
+        Durably queue a webhook and acknowledge immediately.
+
+        Delivery (DB change plus forward) is done later by a WebhookWorkerPool.
+        """
+        try:
+            _user_id, _action, ignored = self._validate_webhook(webhook_data)
+            if ignored:
+                return ignored
+            key, inserted = self.webhook_queue.enqueue(webhook_data)
+            return {"status": "queued" if inserted else "duplicate", "idempotency_key": key}
+        except Exception as e:
+            self.logger.error("Webhook enqueue failed: %s", e)
+            return {"status": "error", "message": str(e)}
+
+    def start_webhook_workers(self, workers=None, batch_size=None, max_attempts=None):
+        """Start (or return the running) worker pool draining the webhook queue."""
+        webhook_queue = self.webhook_queue
+        with self._resource_lock:
+            if self._webhook_workers is None:
+                self._webhook_workers = WebhookWorkerPool(
+                    self,
+                    webhook_queue,
+                    workers=workers or self.settings.webhook_workers,
+                    batch_size=batch_size or self.settings.webhook_batch_size,
+                    max_attempts=max_attempts or self.settings.webhook_max_attempts,
+                )
+            workers_pool = self._webhook_workers
+        return workers_pool.start()
 
+    def webhook_queue_stats(self):
+        """Queue depth, lag and delivery throughput counters."""
+        if self._webhook_workers is not None:
+            return self._webhook_workers.metrics()
+        return self.webhook_queue.stats()
+
+
+class NotificationWorker:
+    """
+    Queue-backed background sender for notification emails.
+
+    ``submit`` blocks when ``max_queue`` messages are already waiting (or
+    raises ``queue.Full`` once ``timeout`` expires), which pushes back on
+    producers during incident fan-outs. Workers drain up to ``batch_size``
+    queued messages at a time through ``send_notifications_bulk``.
+    """
+
+    _STOP = object()
+
+    def __init__(self, processor, workers=1, max_queue=1000, batch_size=50):
+        self.processor = processor
+        self.workers = workers
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+
+    def start(self):
+        if not self._threads:
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"notification-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, recipient, subject, body, timeout=None):
+        """Queue a message and return a Future resolving to the send result."""
+        future = Future()
+        self._queue.put(((recipient, subject, body), future), timeout=timeout)
+        return future
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    self._queue.put(item)
+                    break
+                batch.append(item)
             try:
-                user_id = int(user_id)
-            except (TypeError, ValueError):
-                self.logger.warning("Webhook payload missing valid user_id")
-                return {"status": "ignored", "reason": "invalid user_id"}
+                results = self.processor.send_notifications_bulk([message for message, _future in batch])
+            except Exception as e:
+                self.processor.logger.error("Notification batch failed: %s", e)
+                results = [False] * len(batch)
+            for (_message, future), result in zip(batch, results):
+                future.set_result(result)
 
-            if action == 'delete_user':
-                conn, cursor = self.connect_to_database()
-                if cursor:
-                    cursor.execute("DELETE FROM user_data WHERE id = ?", (user_id,))
-                    conn.commit()
-                    conn.close()
-                    self.logger.info(f"Deleted user {user_id} via webhook request")
-            
-            response = self.session.post(
-                WEBHOOK_ENDPOINT,
-                json=webhook_data,
-                timeout=self.request_timeout
+    def stop(self):
+        """Send everything already queued, then stop the worker threads."""
+        for _thread in self._threads:
+            self._queue.put(self._STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+
+class WebhookQueue:
+    """
+    Durable SQLite-backed write-ahead queue for inbound webhooks.
+
+    Entries are deduplicated by idempotency key. Claimed entries that are not
+    acknowledged (or extended) within ``visibility_timeout`` seconds, for
+    example after a crash, become claimable again.
+    """
+
+    def __init__(self, path, visibility_timeout=60.0, pool_size=4):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self._pool = SQLiteConnectionPool(
+            path, max_size=pool_size, ensure_schema=_ensure_webhook_queue_schema, pragmas=_WEBHOOK_QUEUE_PRAGMAS
+        )
+
+    @staticmethod
+    def idempotency_key_for(payload):
+        explicit = payload.get('idempotency_key') or payload.get('event_id')
+        if explicit:
+            return str(explicit)
+        import hashlib
+
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def enqueue(self, payload, idempotency_key=None):
+        """Persist a payload; returns ``(idempotency_key, inserted)``."""
+        key = idempotency_key or self.idempotency_key_for(payload)
+        now = time.time()
+        with self._pool.connection() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO webhook_queue (idempotency_key, payload, enqueued_at, available_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload, default=str), now, now),
             )
-            response.raise_for_status()
-            
-            return {"status": "processed", "webhook_response": response.status_code}
-            
+            conn.commit()
+        return key, cursor.rowcount == 1
+
+    def claim(self, batch_size):
+        """Atomically claim up to ``batch_size`` ready entries as ``(id, key, payload, attempts)``."""
+        now = time.time()
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, idempotency_key, payload, attempts FROM webhook_queue "
+                "WHERE (status = 'pending' AND available_at <= ?) "
+                "   OR (status = 'in_flight' AND claimed_at <= ?) "
+                "ORDER BY id LIMIT ?",
+                (now, now - self.visibility_timeout, batch_size),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE webhook_queue SET status = 'in_flight', claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                [(now, row[0]) for row in rows],
+            )
+            conn.commit()
+        return [(entry_id, key, json.loads(payload), attempts + 1) for entry_id, key, payload, attempts in rows]
+
+    def ack(self, entry_ids):
+        if not entry_ids:
+            return
+        with self._pool.connection() as conn:
+            conn.executemany(
+                "UPDATE webhook_queue SET status = 'done', completed_at = ?, last_error = NULL WHERE id = ?",
+                [(time.time(), entry_id) for entry_id in entry_ids],
+            )
+            conn.commit()
+
+    def extend(self, entry_ids):
+        """Restart the visibility window of entries that are still in flight."""
+        if not entry_ids:
+            return
+        with self._pool.connection() as conn:
+            conn.executemany(
+                "UPDATE webhook_queue SET claimed_at = ? WHERE id = ? AND status = 'in_flight'",
+                [(time.time(), entry_id) for entry_id in entry_ids],
+            )
+            conn.commit()
+
+    def retry(self, entry_id, error, delay):
+        with self._pool.connection() as conn:
+            conn.execute(
+                "UPDATE webhook_queue SET status = 'pending', available_at = ?, last_error = ? WHERE id = ?",
+                (time.time() + delay, error, entry_id),
+            )
+            conn.commit()
+
+    def dead_letter(self, entry_id, error):
+        with self._pool.connection() as conn:
+            conn.execute(
+                "UPDATE webhook_queue SET status = 'dead', completed_at = ?, last_error = ? WHERE id = ?",
+                (time.time(), error, entry_id),
+            )
+            conn.commit()
+
+    def purge_completed(self, older_than_seconds=86400.0):
+        """Drop acknowledged entries (and their idempotency keys) older than the cutoff."""
+        with self._pool.connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM webhook_queue WHERE status = 'done' AND completed_at <= ?",
+                (time.time() - older_than_seconds,),
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def stats(self):
+        """Queue depth per status and lag (age of the oldest undelivered entry)."""
+        with self._pool.connection() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM webhook_queue GROUP BY status"))
+            oldest = conn.execute(
+                "SELECT MIN(enqueued_at) FROM webhook_queue WHERE status IN ('pending', 'in_flight')"
+            ).fetchone()[0]
+        return {
+            "depth": counts.get('pending', 0) + counts.get('in_flight', 0),
+            "pending": counts.get('pending', 0),
+            "in_flight": counts.get('in_flight', 0),
+            "done": counts.get('done', 0),
+            "dead": counts.get('dead', 0),
+            "lag_seconds": round(time.time() - oldest, 3) if oldest is not None else 0.0,
+        }
+
+    def close(self):
+        self._pool.close()
+
+
+class WebhookWorkerPool:
+    """
+    Worker threads draining a WebhookQueue through DataProcessor delivery.
+
+    Failed deliveries are retried with exponential backoff until
+    ``max_attempts`` is reached, after which they are dead-lettered.
+    """
+
+    def __init__(self, processor, webhook_queue, workers=4, batch_size=20, max_attempts=5,
+                 base_backoff=0.5, max_backoff=60.0, poll_interval=0.2):
+        self.processor = processor
+        self.queue = webhook_queue
+        self.workers = workers
+        # A claimed batch is delivered sequentially, so it must fit inside the visibility window
+        # or other workers reclaim (and re-deliver) entries this worker still holds.
+        fitting = max(1, int(webhook_queue.visibility_timeout // max(processor.request_timeout, 1e-3)))
+        if batch_size > fitting:
+            processor.logger.warning(
+                "Webhook batch size %d exceeds what %.0fs of visibility allows at a %.1fs request timeout; using %d",
+                batch_size, webhook_queue.visibility_timeout, processor.request_timeout, fitting,
+            )
+            batch_size = fitting
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._counters = {"delivered": 0, "retried": 0, "dead_lettered": 0}
+        self._started_at = None
+
+    def start(self):
+        if not self._threads:
+            self._stop.clear()
+            self._started_at = time.monotonic()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"webhook-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def drain(self, timeout=None):
+        """Block until nothing is pending or in flight (or ``timeout`` expires)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.stats()["depth"]:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = self.queue.claim(self.batch_size)
+            except Exception as e:
+                self.processor.logger.error("Webhook queue claim failed: %s", e)
+                batch = []
+            if not batch:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            # Ack each entry as soon as it is delivered, and keep the rest of the batch claimed
+            # once half the visibility window has passed.
+            refreshed_at = time.monotonic()
+            for position, (entry_id, key, payload, attempts) in enumerate(batch):
+                if time.monotonic() - refreshed_at > self.queue.visibility_timeout / 2:
+                    self.queue.extend([entry[0] for entry in batch[position:]])
+                    refreshed_at = time.monotonic()
+                try:
+                    self.processor._deliver_webhook(payload, idempotency_key=key)
+                except Exception as e:
+                    self._handle_failure(entry_id, attempts, e)
+                    continue
+                self.queue.ack([entry_id])
+                with self._lock:
+                    self._counters["delivered"] += 1
+
+    def _handle_failure(self, entry_id, attempts, error):
+        if attempts >= self.max_attempts:
+            self.processor.logger.error("Webhook %s dead-lettered after %d attempts: %s", entry_id, attempts, error)
+            self.queue.dead_letter(entry_id, str(error))
+            counter = "dead_lettered"
+        else:
+            delay = min(self.base_backoff * 2 ** (attempts - 1), self.max_backoff)
+            self.processor.logger.warning("Webhook %s attempt %d failed; retrying in %.2fs", entry_id, attempts, delay)
+            self.queue.retry(entry_id, str(error), delay)
+            counter = "retried"
+        with self._lock:
+            self._counters[counter] += 1
+
+    def metrics(self):
+        """Queue depth and lag plus delivery throughput since start."""
+        with self._lock:
+            metrics = dict(self._counters)
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        metrics["throughput_per_sec"] = round(metrics["delivered"] / elapsed, 3) if elapsed > 0 else 0.0
+        metrics.update(self.queue.stats())
+        return metrics
+
+
+# Row change applied by the batch writer per webhook action; update_user is forwarded only.
+_WEBHOOK_WRITES = {"delete_user": "DELETE FROM user_data WHERE id = ?"}
+
+
+class SQLiteBatchWriter:
+    """
+    Single writer thread that group-commits statements against one database.
+
+    Producers (threads, or worker processes through a multiprocessing queue
+    passed as ``source``) send ``("ops", [(token, sql, params), ...])``.
+    Statements run in arrival order and are committed every ``batch_size``
+    statements or ``flush_ms`` after the first pending one. Lock wait is the
+    time BEGIN IMMEDIATE spends waiting for SQLite's write lock. A failed
+    batch is replayed one statement per transaction, and the ``(group, index)``
+    tokens of statements that still fail are kept for ``pop_failures``.
+    ``("ack", (group, reply))`` commits what the producer sent before it and
+    puts that group's ``{index: error}`` failures so far on ``reply``.
+    ``running``, an optional Event (e.g. a multiprocessing one), is set while
+    the writer thread is alive so producers waiting on a reply can detect a
+    dead writer.
+    """
+
+    def __init__(self, db_path, batch_size=500, flush_ms=20.0, busy_timeout=5.0, source=None, logger=None,
+                 running=None):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_ms / 1000.0
+        self.queue = source if source is not None else queue.Queue()
+        self.logger = logger or logging.getLogger(__name__)
+        self.running = running
+        self._pool = SQLiteConnectionPool(db_path, max_size=1, timeout=busy_timeout)
+        self._condition = threading.Condition()
+        self._markers = {}
+        self._failures = {}
+        self._thread = None
+        self._started_at = None
+        self._stats = {
+            "commits": 0,
+            "statements": 0,
+            "failed_statements": 0,
+            "lock_wait_seconds": 0.0,
+            "lock_wait_max": 0.0,
+            "commit_seconds": 0.0,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._started_at = time.monotonic()
+            if self.running is not None:
+                self.running.set()
+            self._thread = threading.Thread(target=self._run, name="sqlite-batch-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, sql, params, token=None):
+        self.queue.put(("ops", [(token, sql, params)]))
+
+    def mark(self, key):
+        """Commit everything this producer sent before the marker, then count ``key`` as reached."""
+        self.queue.put(("mark", key))
+
+    def wait_for(self, key, count=1):
+        """Block until ``count`` markers for ``key`` have been reached."""
+        with self._condition:
+            while self._markers.get(key, 0) < count:
+                if self._thread is None or not self._thread.is_alive():
+                    raise RuntimeError("SQLite batch writer stopped")
+                self._condition.wait(0.5)
+            self._markers.pop(key, None)
+
+    def pop_failures(self, group):
+        """``{index: error}`` for failed statements whose token was ``(group, index)``."""
+        with self._condition:
+            return self._failures.pop(group, {})
+
+    def _run(self):
+        conn = self._pool.acquire()
+        pending = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if not pending else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = ("flush", None)
+                if item is None:
+                    break
+                kind, payload = item
+                if kind == "ops":
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.extend(payload)
+                    if len(pending) >= self.batch_size:
+                        while len(pending) >= self.batch_size:
+                            self._commit(conn, pending[:self.batch_size])
+                            del pending[:self.batch_size]
+                        deadline = time.monotonic() + self.flush_interval
+                    continue
+                if pending:
+                    self._commit(conn, pending)
+                    pending = []
+                if kind == "mark":
+                    with self._condition:
+                        self._markers[payload] = self._markers.get(payload, 0) + 1
+                        self._condition.notify_all()
+                elif kind == "ack":
+                    group, reply = payload
+                    with self._condition:
+                        failures = dict(self._failures.get(group, {}))
+                    reply.put(failures)
+        finally:
+            try:
+                if pending:
+                    self._commit(conn, pending)
+                self._pool.release(conn)
+            finally:
+                if self.running is not None:
+                    self.running.clear()
+
+    @staticmethod
+    def _apply(conn, ops):
+        # Consecutive statements with the same SQL go through one executemany, keeping overall order.
+        start = 0
+        while start < len(ops):
+            sql = ops[start][1]
+            end = start + 1
+            while end < len(ops) and ops[end][1] == sql:
+                end += 1
+            conn.executemany(sql, [op[2] for op in ops[start:end]])
+            start = end
+
+    def _commit(self, conn, ops):
+        import sqlite3
+
+        started = time.perf_counter()
+        locked = started
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            locked = time.perf_counter()
+            self._apply(conn, ops)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            if len(ops) > 1:
+                self.logger.warning("Batch of %d statements failed (%s); retrying individually", len(ops), e)
+                for op in ops:
+                    self._commit(conn, [op])
+                return
+            self.logger.error("Batched statement failed: %s", e)
+            token = ops[0][0]
+            with self._condition:
+                self._stats["failed_statements"] += 1
+                if token is not None:
+                    self._failures.setdefault(token[0], {})[token[1]] = str(e)
+            return
+        lock_wait = locked - started
+        with self._condition:
+            stats = self._stats
+            stats["commits"] += 1
+            stats["statements"] += len(ops)
+            stats["lock_wait_seconds"] += lock_wait
+            stats["lock_wait_max"] = max(stats["lock_wait_max"], lock_wait)
+            stats["commit_seconds"] += time.perf_counter() - started
+
+    def close(self):
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._pool.close()
+
+    def metrics(self):
+        """Commit counts, statements per commit and lock wait; rates are over the writer's uptime."""
+        with self._condition:
+            stats = dict(self._stats)
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        return {
+            "commits": stats["commits"],
+            "statements": stats["statements"],
+            "failed_statements": stats["failed_statements"],
+            "avg_batch": round(stats["statements"] / stats["commits"], 2) if stats["commits"] else 0.0,
+            "commits_per_sec": round(stats["commits"] / elapsed, 3) if elapsed > 0 else 0.0,
+            "lock_wait_ms_total": round(stats["lock_wait_seconds"] * 1000, 3),
+            "lock_wait_ms_max": round(stats["lock_wait_max"] * 1000, 3),
+            "commit_ms_total": round(stats["commit_seconds"] * 1000, 3),
+        }
+
+
+_SHARD_WORKER = {}
+# How often a shard waiting for the writer's commit acknowledgement checks that the writer is alive.
+_WRITER_ACK_POLL_SECONDS = 1.0
+
+
+def _init_webhook_shard(ops_queue, writer_running, settings, overrides):
+    processor = DataProcessor(settings)
+    for name, value in overrides.items():
+        setattr(processor, name, value)
+    _SHARD_WORKER.update(queue=ops_queue, writer_running=writer_running, processor=processor)
+
+
+def _queue_webhook_writes(call_id, items, batch_size):
+    """Stream the row changes for ``items`` to the writer in order."""
+    ops_queue = _SHARD_WORKER["queue"]
+    pending = []
+    for index, user_id, action, _webhook_data in items:
+        sql = _WEBHOOK_WRITES.get(action)
+        if sql is not None:
+            pending.append(((call_id, index), sql, (user_id,)))
+            if len(pending) >= batch_size:
+                ops_queue.put(("ops", pending))
+                pending = []
+    if pending:
+        ops_queue.put(("ops", pending))
+
+
+def _await_writer_commit(call_id, reply):
+    """Block until the writer has committed everything this shard sent; returns the call's failures so far."""
+    _SHARD_WORKER["queue"].put(("ack", (call_id, reply)))
+    writer_running = _SHARD_WORKER["writer_running"]
+    while True:
+        try:
+            return reply.get(timeout=_WRITER_ACK_POLL_SECONDS)
+        except queue.Empty:
+            if not writer_running.is_set():
+                raise RuntimeError("SQLite batch writer stopped before committing this shard's changes")
+
+
+def _webhook_waves(items):
+    """Split items into waves holding at most one webhook per user, keeping each user's order."""
+    waves = []
+    seen = {}
+    for item in items:
+        wave = seen.get(item[1], 0)
+        seen[item[1]] = wave + 1
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append(item)
+    return waves
+
+
+def _forward_webhook_lane(items, failures):
+    """Forward webhooks in order, skipping those whose row change failed to commit."""
+    processor = _SHARD_WORKER["processor"]
+    results = []
+    for index, _user_id, _action, webhook_data in items:
+        if index in failures:
+            # As in _deliver_webhook, a change that did not commit is not forwarded.
+            results.append((index, {"status": "error", "message": failures[index]}))
+            continue
+        try:
+            result = processor._forward_webhook(webhook_data)
         except Exception as e:
-            self.logger.error(f"Webhook processing failed: {str(e)}")
+            processor.logger.error("Webhook processing failed: %s", e)
+            result = {"status": "error", "message": str(e)}
+        results.append((index, result))
+    return results
+
+
+def _forward_webhooks(items, failures, shards, lanes):
+    if lanes < 2 or len(items) < 2:
+        return _forward_webhook_lane(items, failures)
+    split = [[] for _ in range(lanes)]
+    for item in items:
+        split[item[1] // shards % lanes].append(item)
+    executor = _SHARD_WORKER.get("lanes")
+    if executor is None:
+        executor = _SHARD_WORKER["lanes"] = ThreadPoolExecutor(max_workers=lanes, thread_name_prefix="webhook-lane")
+    futures = [executor.submit(_forward_webhook_lane, lane, failures) for lane in split if lane]
+    return [entry for future in futures for entry in future.result()]
+
+
+def _run_webhook_shard(call_id, items, batch_size, shards, lanes, reply=None):
+    """
+    Handle one shard's webhooks, then mark the call as reached for the writer.
+
+    Without ``reply`` the row changes are only streamed to the writer. When
+    forwarding, the shard works in waves with at most one webhook per user:
+    it streams a wave's changes, waits on ``reply`` until the writer has
+    committed them, then forwards the wave, split by user into ``lanes``
+    threads so HTTP round trips overlap. A webhook is therefore forwarded
+    after its own change commits and before its user's next change does.
+    """
+    if reply is None:
+        _queue_webhook_writes(call_id, items, batch_size)
+        results = [(item[0], {"status": "processed"}) for item in items]
+    else:
+        results = []
+        for wave in _webhook_waves(items):
+            _queue_webhook_writes(call_id, wave, batch_size)
+            failures = _await_writer_commit(call_id, reply)
+            results += _forward_webhooks(wave, failures, shards, lanes)
+    _SHARD_WORKER["queue"].put(("mark", call_id))
+    return results
+
+
+class ShardedWebhookEngine:
+    """
+    Webhook processing across ``shards`` worker processes with one SQLite writer.
+
+    Each ``process`` call partitions payloads by ``user_id % shards`` and
+    hands every shard to a single worker task, so a user's webhooks are
+    handled in arrival order by one process (and, when forwarding, by one of
+    its ``lanes`` threads). Workers stream row changes to a SQLiteBatchWriter
+    in this process, which group-commits them. With ``forward``, a webhook
+    is forwarded only after the writer has acknowledged its change as
+    committed, and before the same user's next change is committed; webhooks
+    whose change failed are not forwarded. Changes for other users in the
+    same call may already be committed when a webhook is forwarded.
+    ``process`` returns once its changes are committed; if the writer stops,
+    the affected webhooks are reported as errors. Calls are serialized to
+    keep per-user order across calls.
+    """
+
+    def __init__(self, processor, shards=None, batch_size=None, flush_ms=None, forward=True, lanes=None):
+        import multiprocessing
+
+        settings = processor.settings
+        self.processor = processor
+        self.logger = processor.logger
+        self.shards = shards or settings.webhook_shards or os.cpu_count() or 1
+        self.lanes = lanes or settings.webhook_shard_lanes
+        self.forward = forward
+        self._ops = multiprocessing.Queue()
+        self._writer_running = multiprocessing.Event()
+        self.writer = SQLiteBatchWriter(
+            processor.db_path,
+            batch_size=batch_size or settings.write_batch_size,
+            flush_ms=settings.write_flush_ms if flush_ms is None else flush_ms,
+            busy_timeout=processor.db_pool_timeout,
+            source=self._ops,
+            logger=self.logger,
+            running=self._writer_running,
+        )
+        self._executor = None
+        self._manager = None
+        self._replies = None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._counters = {"webhooks": 0, "errors": 0, "busy_seconds": 0.0}
+
+    def _pool(self):
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            overrides = {
+                "webhook_endpoint": self.processor.webhook_endpoint,
+                "request_timeout": self.processor.request_timeout,
+            }
+            self.writer.start()
+            if self.forward:
+                # One reply queue per shard for the writer's commit acknowledgements.
+                self._manager = multiprocessing.Manager()
+                self._replies = [self._manager.Queue() for _ in range(self.shards)]
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.shards,
+                initializer=_init_webhook_shard,
+                initargs=(self._ops, self._writer_running, self.processor.settings, overrides),
+            )
+        return self._executor
+
+    def process(self, webhooks):
+        """Process a batch of webhook payloads; results are returned in input order."""
+        webhooks = list(webhooks)
+        results = [None] * len(webhooks)
+        shards = [[] for _ in range(self.shards)]
+        for index, webhook_data in enumerate(webhooks):
+            user_id, action, ignored = self.processor._validate_webhook(webhook_data)
+            if ignored:
+                results[index] = ignored
+            else:
+                shards[user_id % self.shards].append((index, user_id, action, webhook_data))
+
+        with self._lock:
+            started = time.perf_counter()
+            executor = self._pool()
+            self._calls += 1
+            call_id = self._calls
+            submitted = [
+                (items, executor.submit(
+                    _run_webhook_shard, call_id, items, self.writer.batch_size, self.shards, self.lanes,
+                    self._replies[shard] if self.forward else None,
+                ))
+                for shard, items in enumerate(shards) if items
+            ]
+            completed = 0
+            for items, future in submitted:
+                try:
+                    for index, result in future.result():
+                        results[index] = result
+                    completed += 1
+                except Exception as e:
+                    self.logger.error("Webhook shard failed: %s", e)
+                    for item in items:
+                        results[item[0]] = {"status": "error", "message": str(e)}
+            try:
+                self.writer.wait_for(call_id, completed)
+            except RuntimeError as e:
+                self.logger.error("Webhook writer failed: %s", e)
+                if not self.forward:
+                    # Whether the queued changes were committed is unknown once the writer is gone;
+                    # forwarding shards only returned after their changes were acknowledged.
+                    for items, _future in submitted:
+                        for item in items:
+                            results[item[0]] = {"status": "error", "message": str(e)}
+            for index, error in self.writer.pop_failures(call_id).items():
+                results[index] = {"status": "error", "message": error}
+            elapsed = time.perf_counter() - started
+
+            self._counters["webhooks"] += len(webhooks)
+            self._counters["errors"] += sum(result["status"] == "error" for result in results)
+            self._counters["busy_seconds"] += elapsed
+        return results
+
+    def metrics(self):
+        """Writer commit/lock-wait figures plus webhook and commit rates over time spent in ``process``."""
+        with self._lock:
+            counters = dict(self._counters)
+        metrics = self.writer.metrics()
+        busy = counters.pop("busy_seconds")
+        metrics.update(counters)
+        metrics["shards"] = self.shards
+        metrics["batch_size"] = self.writer.batch_size
+        metrics["busy_seconds"] = round(busy, 4)
+        metrics["webhooks_per_sec"] = round(counters["webhooks"] / busy, 3) if busy > 0 else 0.0
+        metrics["commits_per_sec"] = round(metrics["commits"] / busy, 3) if busy > 0 else 0.0
+        return metrics
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+                self._replies = None
+            self.writer.close()
+            self._ops.close()
+
+
+class AsyncDataProcessor:
+    """
+    Asyncio counterpart of DataProcessor for high-concurrency workers.
+
+    HTTP goes through a shared aiohttp session with a per-destination
+    semaphore so one slow downstream cannot exhaust every slot. SQLite and
+    SMTP work reuses the wrapped DataProcessor (and its connection pool) off
+    the event loop via ``asyncio.to_thread``.
+    """
+
+    def __init__(self, processor=None, per_destination_limit=None, max_connections=None):
+        self.processor = processor or DataProcessor()
+        self.logger = self.processor.logger
+        settings = self.processor.settings
+        self.per_destination_limit = per_destination_limit or settings.async_per_destination
+        self.max_connections = max_connections or settings.async_max_connections
+        self._http = None
+        self._semaphores = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def _http_session(self):
+        if self._http is None:
+            import aiohttp
+
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.processor.request_timeout),
+                headers={'User-Agent': 'DataProcessor/1.1'},
+            )
+        return self._http
+
+    def _destination_limit(self, destination):
+        semaphore = self._semaphores.get(destination)
+        if semaphore is None:
+            import asyncio
+
+            semaphore = self._semaphores[destination] = asyncio.Semaphore(self.per_destination_limit)
+        return semaphore
+
+    async def _post(self, url, payload, headers=None):
+        async with self._destination_limit(urlsplit(url).netloc):
+            async with self._http_session().post(url, json=payload, headers=headers) as response:
+                response.raise_for_status()
+                body = await response.read()
+                return response.status, body
+
+    async def fetch_user_data(self, user_id):
+        import asyncio
+
+        return await asyncio.to_thread(self.processor.fetch_user_data, user_id)
+
+    async def call_external_api(self, data):
+        """Async variant of DataProcessor.call_external_api."""
+        if not self.processor.api_key:
+            self.logger.warning("Skipping API call because PROCESSOR_API_KEY is not configured")
+            return None
+
+        try:
+            _status, body = await self._post(
+                f"{self.processor.api_base_url}/process", data, headers=self.processor._api_headers()
+            )
+            return json.loads(body)
+        except Exception as e:
+            self.logger.error("API request exception: %s", e)
+            return None
+
+    async def send_notification_email(self, recipient, subject, body):
+        """Async variant of DataProcessor.send_notification_email, bounded per SMTP server."""
+        import asyncio
+
+        smtp_server = self.processor.settings.smtp_server
+        async with self._destination_limit(f"smtp://{smtp_server}"):
+            return await asyncio.to_thread(self.processor.send_notification_email, recipient, subject, body)
+
+    async def process_webhook_data(self, webhook_data):
+        """Async variant of DataProcessor.process_webhook_data."""
+        import asyncio
+
+        try:
+            user_id, action, ignored = self.processor._validate_webhook(webhook_data)
+            if ignored:
+                return ignored
+
+            if action == 'delete_user':
+                await asyncio.to_thread(self.processor._delete_user_record, user_id)
+
+            status, _body = await self._post(self.processor.webhook_endpoint, webhook_data)
+            return {"status": "processed", "webhook_response": status}
+
+        except Exception as e:
+            self.logger.error("Webhook processing failed: %s", e)
             return {"status": "error", "message": str(e)}
 
+    async def fetch_users(self, user_ids):
+        import asyncio
+
+        return await asyncio.gather(*(self.fetch_user_data(user_id) for user_id in user_ids))
+
+    async def call_external_api_many(self, payloads):
+        import asyncio
+
+        return await asyncio.gather(*(self.call_external_api(payload) for payload in payloads))
+
+    async def process_webhooks(self, webhooks):
+        import asyncio
+
+        return await asyncio.gather(*(self.process_webhook_data(webhook) for webhook in webhooks))
+
+    async def send_notifications(self, messages):
+        """Send ``(recipient, subject, body)`` tuples concurrently."""
+        import asyncio
+
+        return await asyncio.gather(*(self.send_notification_email(*message) for message in messages))
+
 def main():
     """Main function demonstrating the improved secure patterns."""
+    logging.basicConfig(level=logging.DEBUG)
     processor = DataProcessor()
     print("Starting data processing with enhanced security safeguards...")
     user_data = processor.fetch_user_data(1)
@@ -32,6 +32,15 @@ a cloud architecture recommendation including basic services needed (database,
 API gateway, compute, storage, etc.).
 """
 
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
 # Your Code Here
 
 problem_statement = """
@@ -144,6 +153,532 @@ practical_considerations = """
 
 
 
+# Executable orchestrator: agent_design as a DAG, run with asyncio.
+# Dependencies come from which other agents each spec's "input" mentions, so
+# the pipeline above is the graph; independent nodes and fanned-out items run
+# concurrently, outputs are memoized by a hash of their inputs, and the
+# review loop re-runs only the nodes whose inputs changed.
+
+
+def build_agent_graph(specs):
+    """Map each agent name to the upstream agents named in its input description."""
+    names = [spec["name"] for spec in specs]
+    graph = {}
+    for spec in specs:
+        graph[spec["name"]] = [
+            name for name in names
+            if name != spec["name"] and name.lower() in spec["input"].lower()
+        ]
+    order, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Agent graph has a cycle through {name}")
+        visiting.add(name)
+        for upstream in graph[name]:
+            visit(upstream)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return {name: graph[name] for name in order}
+
+
+def _input_hash(name, inputs):
+    payload = json.dumps([name, inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DagOrchestrator:
+    """
+    Runs agent callables over the agent_design graph.
+
+    agents: {agent name: callable(inputs) -> output}; coroutine functions are
+        awaited, plain functions run in a worker thread.
+    fan_out: {agent name: upstream name}; when that upstream returns a list,
+        the agent runs once per item, concurrently (e.g. one cost check per
+        candidate sketch).
+    review: (reviewer, target, check); check(reviewer_output) returns feedback
+        notes for target, or None to accept. Feedback starts another round in
+        which only target and its downstream nodes miss the cache.
+    """
+
+    def __init__(self, specs, agents, fan_out=None, review=None, max_rounds=3, max_concurrency=32):
+        if max_rounds < 1:
+            raise ValueError("max_rounds must be at least 1")
+        self.graph = build_agent_graph(specs)
+        missing = set(self.graph) - set(agents)
+        if missing:
+            raise ValueError(f"No callable registered for: {sorted(missing)}")
+        self.agents = agents
+        self.fan_out = fan_out or {}
+        self.review = review
+        self.max_rounds = max_rounds
+        self.max_concurrency = max_concurrency
+        self.cache = {}
+        self.timings = []
+        self._inflight = {}
+        self._semaphore = None
+
+    async def _call(self, name, inputs, problem_id, round_number, item=None):
+        key = _input_hash(name, inputs)
+        started = time.perf_counter()
+        task = self._inflight.get(key)
+        cached = key in self.cache
+        if cached:
+            output = self.cache[key]
+        elif task is not None:
+            # Another problem or fan-out item is already computing the same inputs.
+            cached = True
+            output = await task
+        else:
+            task = asyncio.ensure_future(self._execute(name, inputs))
+            self._inflight[key] = task
+            try:
+                output = await task
+                self.cache[key] = output
+            finally:
+                self._inflight.pop(key, None)
+        self.timings.append({
+            "problem": problem_id,
+            "round": round_number,
+            "agent": name,
+            "item": item,
+            "cached": cached,
+            "seconds": round(time.perf_counter() - started, 6),
+        })
+        return output
+
+    async def _execute(self, name, inputs):
+        agent = self.agents[name]
+        async with self._semaphore:
+            if asyncio.iscoroutinefunction(agent):
+                return await agent(inputs)
+            return await asyncio.to_thread(agent, inputs)
+
+    async def _run_node(self, name, problem, feedback, upstream_tasks, state, problem_id, round_number):
+        upstream = {dep: await upstream_tasks[dep] for dep in self.graph[name]}
+        if state["rework"] is not None:
+            return None
+        inputs = {"problem": problem, **upstream}
+        if name in feedback:
+            inputs["feedback"] = feedback[name]
+
+        source = self.fan_out.get(name)
+        if source and isinstance(upstream.get(source), list):
+            output = list(await asyncio.gather(*(
+                self._call(name, {**inputs, source: item}, problem_id, round_number, index)
+                for index, item in enumerate(upstream[source])
+            )))
+        else:
+            output = await self._call(name, inputs, problem_id, round_number)
+
+        if self.review and name == self.review[0]:
+            notes = self.review[2](output)
+            if notes is not None and round_number < self.max_rounds:
+                state["rework"] = notes
+        return output
+
+    async def run(self, problem, problem_id=0):
+        """Run the graph for one problem statement; returns {agent name: output}."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        feedback = {}
+        round_number = 1
+        # _run_node stops asking for rework in round max_rounds, so the loop always ends there.
+        while True:
+            state = {"rework": None}
+            tasks = {}
+            for name in self.graph:
+                tasks[name] = asyncio.ensure_future(
+                    self._run_node(name, problem, feedback, tasks, state, problem_id, round_number)
+                )
+            outputs = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+            if state["rework"] is None:
+                outputs["rounds"] = round_number
+                return outputs
+            target = self.review[1]
+            feedback = {target: feedback.get(target, []) + [state["rework"]]}
+            round_number += 1
+
+    async def run_many(self, problems):
+        """Run many problem statements concurrently over a shared cache."""
+        return await asyncio.gather(*(self.run(problem, index) for index, problem in enumerate(problems)))
+
+    def timing_summary(self):
+        """Executions, cache hits and total seconds per agent."""
+        summary = {}
+        for record in self.timings:
+            entry = summary.setdefault(record["agent"], {"calls": 0, "cached": 0, "seconds": 0.0})
+            entry["calls"] += 1
+            entry["cached"] += record["cached"]
+            entry["seconds"] = round(entry["seconds"] + record["seconds"], 6)
+        return summary
+
+
+def stub_agents(delay=0.05):
+    """Offline stand-ins for the five agents; each sleeps ``delay`` seconds to mimic a model call."""
+
+    async def context_collector(inputs):
+        await asyncio.sleep(delay)
+        problem = inputs["problem"]
+        return {"summary": problem.strip().splitlines()[0], "mentions_payments": "payment" in problem.lower()}
+
+    async def requirement_mapper(inputs):
+        await asyncio.sleep(delay)
+        needs = ["compute", "database", "monitoring"]
+        if inputs["Context Collector"]["mentions_payments"]:
+            needs.append("pci")
+        return {"checklist": needs}
+
+    async def solution_sketcher(inputs):
+        await asyncio.sleep(delay)
+        options = ["serverless", "containers", "dedicated servers"]
+        for notes in inputs.get("feedback", []):
+            options = [option for option in options if option not in notes["drop"]]
+        return [{"compute": option, "covers": inputs["Requirement Mapper"]["checklist"]} for option in options]
+
+    async def cost_and_risk_checker(inputs):
+        await asyncio.sleep(delay)
+        sketch = inputs["Solution Sketcher"]
+        monthly = {"serverless": 120, "containers": 300, "dedicated servers": 1500}[sketch["compute"]]
+        return {"compute": sketch["compute"], "monthly_usd": monthly, "flagged": monthly > 1000}
+
+    async def report_assembler(inputs):
+        await asyncio.sleep(delay)
+        best = min(inputs["Cost and Risk Checker"], key=lambda check: check["monthly_usd"])
+        return {
+            "recommendation": best["compute"],
+            "monthly_usd": best["monthly_usd"],
+            "requirements": inputs["Requirement Mapper"]["checklist"],
+        }
+
+    return {
+        "Context Collector": context_collector,
+        "Requirement Mapper": requirement_mapper,
+        "Solution Sketcher": solution_sketcher,
+        "Cost and Risk Checker": cost_and_risk_checker,
+        "Report Assembler": report_assembler,
+    }
+
+
+def flag_costly_sketches(checks):
+    """Review check for the Cost and Risk Checker: send flagged options back to the Solution Sketcher."""
+    flagged = [check["compute"] for check in checks if check["flagged"]]
+    return {"drop": flagged, "note": "switch to serverless"} if flagged else None
+
+
+def build_stub_orchestrator(delay=0.05):
+    return DagOrchestrator(
+        agent_design,
+        stub_agents(delay),
+        fan_out={"Cost and Risk Checker": "Solution Sketcher"},
+        review=("Cost and Risk Checker", "Solution Sketcher", flag_costly_sketches),
+    )
+
+
+# Knowledge base for reusability_plan / answer_q4: past briefs, costs and
+# post-mortems in SQLite FTS5, plus an optional NumPy vector index over
+# precomputed embeddings for similarity lookups.
+
+_KB_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    scenario TEXT NOT NULL,
+    brief TEXT NOT NULL,
+    monthly_cost REAL,
+    postmortem TEXT NOT NULL DEFAULT '',
+    embedding BLOB
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    scenario, brief, postmortem, content='reports', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN
+    INSERT INTO reports_fts(rowid, scenario, brief, postmortem)
+    VALUES (new.id, new.scenario, new.brief, new.postmortem);
+END;
+CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN
+    INSERT INTO reports_fts(reports_fts, rowid, scenario, brief, postmortem)
+    VALUES ('delete', old.id, old.scenario, old.brief, old.postmortem);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_vocab USING fts5vocab(reports_fts, 'row');
+"""
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text):
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+@lru_cache(maxsize=65536)
+def _token_slot(token, dim):
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+class RecommendationKnowledgeBase:
+    """
+    Local store of past architecture recommendations.
+
+    Text search uses an FTS5 index kept in sync by triggers. When NumPy is
+    available, each report also gets a hashed bag-of-words embedding,
+    computed once on insert and stored with the row. The embeddings are
+    kept in an in-memory matrix that grows as reports are added, so a
+    similarity query is one matrix-vector product. Query results are cached
+    until the next write.
+    """
+
+    def __init__(self, path=":memory:", dim=128, use_vectors=True, cache_size=1024):
+        self.dim = dim
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_KB_SCHEMA_SQL)
+        self._np = None
+        if use_vectors:
+            try:
+                import numpy
+            except ImportError:
+                numpy = None
+            self._np = numpy
+        self._vectors = None
+        self._ids = None
+        self._count = 0
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        if self._np is not None:
+            self._load_vectors()
+
+    def _embed(self, text):
+        np = self._np
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _tokens(text):
+            slot, sign = _token_slot(token, self.dim)
+            vector[slot] += sign
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _append_vectors(self, ids, vectors):
+        np = self._np
+        needed = self._count + len(ids)
+        if self._vectors is None or needed > len(self._vectors):
+            capacity = max(needed, 2 * (0 if self._vectors is None else len(self._vectors)), 1024)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown_ids = np.zeros(capacity, dtype=np.int64)
+            if self._count:
+                grown[:self._count] = self._vectors[:self._count]
+                grown_ids[:self._count] = self._ids[:self._count]
+            self._vectors, self._ids = grown, grown_ids
+        self._vectors[self._count:needed] = vectors
+        self._ids[self._count:needed] = ids
+        self._count = needed
+
+    def _load_vectors(self):
+        np = self._np
+        rows = self.conn.execute("SELECT id, embedding FROM reports WHERE embedding IS NOT NULL").fetchall()
+        if rows:
+            ids = [row[0] for row in rows]
+            vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), self.dim)
+            self._append_vectors(ids, vectors)
+
+    def add_reports(self, reports):
+        """
+        Insert reports (dicts with scenario, brief, monthly_cost, postmortem) and index them.
+
+        Returns:
+            list: ids of the new reports
+        """
+        rows, vectors = [], []
+        for report in reports:
+            text = " ".join((report["scenario"], report["brief"], report.get("postmortem", "")))
+            vector = self._embed(text) if self._np is not None else None
+            vectors.append(vector)
+            rows.append((
+                report["scenario"],
+                report["brief"],
+                report.get("monthly_cost"),
+                report.get("postmortem", ""),
+                None if vector is None else vector.tobytes(),
+            ))
+        with self.conn:
+            first_id = (self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM reports").fetchone()[0]) + 1
+            ids = list(range(first_id, first_id + len(rows)))
+            self.conn.executemany(
+                "INSERT INTO reports (id, scenario, brief, monthly_cost, postmortem, embedding) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(report_id, *row) for report_id, row in zip(ids, rows)],
+            )
+        if self._np is not None and ids:
+            self._append_vectors(ids, self._np.stack(vectors))
+        self._cache.clear()
+        return ids
+
+    def _document_frequencies(self, terms):
+        frequencies = {}
+        for term in terms:
+            row = self.conn.execute("SELECT doc FROM reports_vocab WHERE term = ?", (term,)).fetchone()
+            if row:
+                frequencies[term] = row[0]
+        return frequencies
+
+    def _text_ranking(self, query, limit):
+        """
+        bm25 ranking from FTS5.
+
+        Ranking cost grows with the number of matching rows, so rather than
+        OR-ing every term (which matches most of the corpus for common words)
+        this tries, in order: all terms together, the selective terms
+        (in at most 10% of reports), then the single rarest term.
+        """
+        frequencies = self._document_frequencies(dict.fromkeys(_tokens(query)))
+        if not frequencies:
+            return []
+        terms = sorted(frequencies, key=frequencies.get)
+        total = self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        selective = [term for term in terms if frequencies[term] <= total * 0.1]
+        expressions = []
+        if len(terms) > 1:
+            expressions.append(" AND ".join(f'"{term}"' for term in terms))
+        if selective:
+            expressions.append(" OR ".join(f'"{term}"' for term in selective))
+        if not selective or len(terms) == 1:
+            expressions.append(f'"{terms[0]}"')
+
+        ranked = []
+        for expression in expressions:
+            rows = self.conn.execute(
+                "SELECT rowid FROM reports_fts WHERE reports_fts MATCH ? ORDER BY rank LIMIT ?",
+                (expression, limit),
+            ).fetchall()
+            ranked.extend(row[0] for row in rows if row[0] not in ranked)
+            if len(ranked) >= limit:
+                break
+        return ranked[:limit]
+
+    def _vector_ranking(self, query, limit):
+        if self._np is None or not self._count:
+            return []
+        np = self._np
+        scores = self._vectors[:self._count] @ self._embed(query)
+        limit = min(limit, self._count)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return self._ids[top].tolist()
+
+    def search(self, query, k=5, mode="hybrid"):
+        """
+        Top-k past reports for ``query``.
+
+        mode: "text" (FTS5 bm25), "vector" (cosine over embeddings) or
+        "hybrid" (reciprocal-rank fusion of both; text only without NumPy).
+        """
+        key = (query, k, mode)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        if mode == "text":
+            ranked = self._text_ranking(query, k)
+        elif mode == "vector":
+            ranked = self._vector_ranking(query, k)
+        elif mode == "hybrid":
+            fused = {}
+            for ranking in (self._text_ranking(query, k * 4), self._vector_ranking(query, k * 4)):
+                for rank, report_id in enumerate(ranking):
+                    fused[report_id] = fused.get(report_id, 0.0) + 1.0 / (60 + rank)
+            ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        results = self._fetch(ranked)
+        self._cache[key] = results
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return results
+
+    def _fetch(self, ids):
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"SELECT id, scenario, brief, monthly_cost, postmortem FROM reports WHERE id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        by_id = {
+            row[0]: {"id": row[0], "scenario": row[1], "brief": row[2], "monthly_cost": row[3], "postmortem": row[4]}
+            for row in rows
+        }
+        return [by_id[report_id] for report_id in ids if report_id in by_id]
+
+    def record_result(self, scenario, result, postmortem=""):
+        """Store a Report Assembler output from DagOrchestrator as a new report."""
+        brief = f"{result['recommendation']} for {', '.join(result['requirements'])}"
+        return self.add_reports([{
+            "scenario": scenario,
+            "brief": brief,
+            "monthly_cost": result.get("monthly_usd"),
+            "postmortem": postmortem,
+        }])[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def _synthetic_reports(count, seed=0):
+    import random
+
+    rng = random.Random(seed)
+    scenarios = ["e-commerce site", "support chatbot", "expense tracker", "analytics pipeline", "booking portal"]
+    services = ["serverless functions", "managed containers", "dedicated servers", "managed sql", "object storage",
+                "redis cache", "cdn", "api gateway", "message queue", "data warehouse", "vpn link", "waf"]
+    lessons = ["cold starts hurt checkout", "costs spiked during sales", "legacy crm sync lagged",
+               "backups were never tested", "cache cut database load", "queue absorbed traffic bursts"]
+    for _ in range(count):
+        yield {
+            "scenario": rng.choice(scenarios),
+            "brief": ", ".join(rng.sample(services, 4)),
+            "monthly_cost": rng.randint(50, 5000),
+            "postmortem": rng.choice(lessons),
+        }
+
+
+def benchmark_knowledge_base(n=100_000, queries=200, k=5):
+    """Insert ``n`` synthetic reports, then time uncached and cached lookups per mode (milliseconds)."""
+    kb = RecommendationKnowledgeBase()
+    started = time.perf_counter()
+    for start in range(0, n, 10_000):
+        kb.add_reports(_synthetic_reports(min(10_000, n - start), seed=start))
+    timings = {"insert_s": round(time.perf_counter() - started, 3)}
+
+    probes = [f"{query} serverless cdn costs" for query in ("e-commerce", "chatbot crm", "expense", "booking")]
+    for mode in ("text", "vector", "hybrid"):
+        samples = []
+        for index in range(queries):
+            kb._cache.clear()
+            started = time.perf_counter()
+            kb.search(f"{probes[index % len(probes)]} {index}", k=k, mode=mode)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        timings[f"{mode}_p50_ms"] = round(samples[len(samples) // 2] * 1000, 3)
+        timings[f"{mode}_p99_ms"] = round(samples[int(len(samples) * 0.99) - 1] * 1000, 3)
+
+    kb.search(probes[0], k=k)
+    started = time.perf_counter()
+    for _ in range(queries):
+        kb.search(probes[0], k=k)
+    timings["cached_ms"] = round((time.perf_counter() - started) / queries * 1000, 4)
+
+    started = time.perf_counter()
+    kb.add_reports(_synthetic_reports(100, seed=n))
+    timings["incremental_add_100_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    kb.close()
+    print(f"[benchmark_knowledge_base] {n} reports: {timings}")
+    return timings
+
 # === WRITTEN RESPONSE QUESTIONS ===
 
 """
@@ -258,3 +793,23 @@ answer_q5 = """
 - Legacy integrations: Requirement Mapper logs legacy systems and interface details; Solution Sketcher adds hybrid connectors (VPN, Direct Connect, integration middleware) to keep everything connected.
 - Rapid cloud changes: Maintain a light-weight catalog of new services and price updates. Agents refresh from it on a schedule so their advice stays current without manual research every time.
 """
+
+
+if __name__ == "__main__":
+    orchestrator = build_stub_orchestrator()
+    scenarios = [
+        "Simple E-commerce Site: online store with product catalog and payment processing.",
+        "Customer Support Chatbot: AI chatbot with CRM integration and human escalation.",
+    ]
+    started = time.perf_counter()
+    results = asyncio.run(orchestrator.run_many(scenarios))
+    for scenario, result in zip(scenarios, results):
+        print(f"{scenario.split(':')[0]}: {result['Report Assembler']} after {result['rounds']} round(s)")
+    print(f"Elapsed: {time.perf_counter() - started:.2f}s")
+    for agent, entry in orchestrator.timing_summary().items():
+        print(f"  {agent}: {entry}")
+
+    knowledge_base = RecommendationKnowledgeBase()
+    for scenario, result in zip(scenarios, results):
+        knowledge_base.record_result(scenario, result["Report Assembler"], postmortem="dedicated servers flagged as too costly")
+    print("Similar past cases:", [hit["scenario"] for hit in knowledge_base.search("online store payments", k=1)])
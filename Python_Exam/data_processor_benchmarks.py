@@ -0,0 +1,890 @@
+"""
+Benchmarks for the DataProcessor service
+Run from this directory: python data_processor_benchmarks.py <benchmark> [options]
+
+Results can be written with --output and compared with --baseline; the run
+exits non-zero when a tracked metric regresses past --threshold.
+
+load_baseline.json holds a reference run of the default load mixes, made with
+python data_processor_benchmarks.py load --output load_baseline.json
+Absolute numbers depend on the machine, so regenerate it on the host that runs
+the comparison before gating on it.
+"""
+
+import argparse
+import inspect
+import json
+import logging
+import os
+import py_compile
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import Security_Issue_Python_code_unmarked as service
+from Security_Issue_Python_code_unmarked import DataProcessor
+
+
+def _sample_rows(count, start=1):
+    for user_id in range(start, start + count):
+        yield (
+            user_id,
+            f"user{user_id}",
+            f"password-{user_id}",
+            f"4111-1111-{user_id:08d}",
+            f"{user_id:09d}",
+            "2024-01-01T00:00:00Z",
+        )
+
+
+def _processor_for(db_path):
+    processor = DataProcessor()
+    processor.db_path = db_path
+    processor.logger.setLevel(logging.WARNING)
+    return processor
+
+
+class _StubApiHandler(BaseHTTPRequestHandler):
+    """
+    Local stand-in for the processing API, batch endpoint and webhook sink.
+
+    Paths in ``server.fail_paths`` answer 500; ``server.max_active`` records
+    the most requests handled at once.
+    """
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        payload = json.loads(body or b"null")
+        server = self.server
+        with server.lock:
+            server.request_counts[self.path] = server.request_counts.get(self.path, 0) + 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if server.delay:
+                time.sleep(server.delay)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+        status = 200
+        if self.path in server.fail_paths:
+            status, response = 500, {"error": "injected failure"}
+        elif self.path.endswith("/process/batch"):
+            response = {"results": [{"processed": item} for item in payload["items"]]}
+        else:
+            response = {"processed": payload}
+        out = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+@contextmanager
+def stub_api_server(delay_ms=0.0):
+    """Run the stub API on localhost and point the service module at it."""
+    server = _StubApiServer(("127.0.0.1", 0), _StubApiHandler)
+    server.lock = threading.Lock()
+    server.request_counts = {}
+    server.active = server.max_active = 0
+    server.fail_paths = set()
+    server.delay = delay_ms / 1000.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    overrides = {"PROCESSOR_API_BASE_URL": f"{base_url}/v1", "PROCESSOR_WEBHOOK_ENDPOINT": f"{base_url}/webhook"}
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    service.get_settings.cache_clear()
+    try:
+        yield server
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        service.get_settings.cache_clear()
+        server.shutdown()
+        server.server_close()
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def benchmark_bulk_user_access(sizes=(10_000, 100_000, 1_000_000)):
+    """Compare upsert_users_bulk/fetch_users_bulk against per-id loops at each size."""
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            loop_processor = _processor_for(os.path.join(workdir, "loop.db"))
+            bulk_processor = _processor_for(os.path.join(workdir, "bulk.db"))
+            ids = list(range(1, size + 1))
+
+            def write_loop():
+                for row in _sample_rows(size):
+                    loop_processor.upsert_users_bulk([row])
+
+            def read_loop():
+                for user_id in ids:
+                    loop_processor.fetch_user_data(user_id)
+
+            _, loop_write = _timed(write_loop)
+            _, bulk_write = _timed(bulk_processor.upsert_users_bulk, _sample_rows(size))
+            _, loop_read = _timed(read_loop)
+            fetched, bulk_read = _timed(bulk_processor.fetch_users_bulk, ids)
+            loop_processor.close()
+            bulk_processor.close()
+
+        if fetched is None or len(fetched) != size:
+            raise RuntimeError(f"Bulk fetch returned {0 if fetched is None else len(fetched)} of {size} rows")
+        results.append({
+            "rows": size,
+            "write_loop_s": round(loop_write, 4),
+            "write_bulk_s": round(bulk_write, 4),
+            "write_speedup": round(loop_write / bulk_write, 2),
+            "read_loop_s": round(loop_read, 4),
+            "read_bulk_s": round(bulk_read, 4),
+            "read_speedup": round(loop_read / bulk_read, 2),
+        })
+    return results
+
+
+def benchmark_hashing_modes(sizes=(200_000,), workers=os.cpu_count()):
+    """Rows/sec for trigger-side hashing versus Python pre-hashing (serial and process pool)."""
+    modes = (
+        ("trigger", False, 0),
+        ("prehash", True, 0),
+        ("prehash_pool", True, workers or 0),
+    )
+    results = []
+    for size in sizes:
+        for mode, prehash, hash_workers in modes:
+            with tempfile.TemporaryDirectory() as workdir:
+                processor = _processor_for(os.path.join(workdir, f"{mode}.db"))
+                processor.prehash_workers = hash_workers
+                written, elapsed = _timed(processor.upsert_users_bulk, list(_sample_rows(size)), prehash)
+                processor.close()
+            if written != size:
+                raise RuntimeError(f"{mode} wrote {written} of {size} rows")
+            results.append({
+                "rows": size,
+                "mode": mode,
+                "workers": hash_workers,
+                "seconds": round(elapsed, 4),
+                "rows_per_sec": round(size / elapsed),
+            })
+    return results
+
+
+def benchmark_api_batching(sizes=(5_000,), concurrency=16, batch_size=50, linger_ms=5.0, delay_ms=2.0):
+    """Throughput of call_external_api versus call_external_api_batched against the stub API."""
+    results = []
+    for size in sizes:
+        payloads = [{"record": index} for index in range(size)]
+        for mode in ("direct", "batched"):
+            with stub_api_server(delay_ms=delay_ms) as server:
+                processor = _processor_for(":memory:")
+                processor.api_key = processor.api_key or "benchmark-key"
+                if mode == "direct":
+                    call = processor.call_external_api
+                else:
+                    processor._api_batcher = service.ApiRequestBatcher(
+                        processor,
+                        max_batch_size=batch_size,
+                        linger_ms=linger_ms,
+                    )
+                    call = processor.call_external_api_batched
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    responses, elapsed = _timed(lambda: list(executor.map(call, payloads)))
+                entry = {
+                    "requests": size,
+                    "mode": mode,
+                    "seconds": round(elapsed, 4),
+                    "calls_per_sec": round(size / elapsed),
+                    "failed": sum(response is None for response in responses),
+                    "http_requests": dict(server.request_counts),
+                }
+                if mode == "batched":
+                    entry["batcher"] = processor.api_batcher.metrics()
+                processor.close()
+            results.append(entry)
+    return results
+
+
+def benchmark_async_processor(sizes=(2_000,), concurrency=16, delay_ms=2.0):
+    """Thread-pool DataProcessor calls versus AsyncDataProcessor against the stub API and webhook sink."""
+    import asyncio
+
+    results = []
+    for size in sizes:
+        payloads = [{"record": index} for index in range(size)]
+        webhooks = [{"user_id": user_id, "action": "delete_user"} for user_id in range(1, size + 1)]
+        for mode in ("threaded", "async"):
+            with tempfile.TemporaryDirectory() as workdir, stub_api_server(delay_ms=delay_ms) as server:
+                processor = _processor_for(os.path.join(workdir, "async.db"))
+                processor.api_key = processor.api_key or "benchmark-key"
+                processor.upsert_users_bulk(_sample_rows(size))
+                if mode == "threaded":
+                    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                        api_results, api_elapsed = _timed(
+                            lambda: list(executor.map(processor.call_external_api, payloads))
+                        )
+                        webhook_results, webhook_elapsed = _timed(
+                            lambda: list(executor.map(processor.process_webhook_data, webhooks))
+                        )
+                else:
+                    async def run():
+                        async with service.AsyncDataProcessor(processor, per_destination_limit=concurrency) as client:
+                            timings = []
+                            for method, items in (
+                                (client.call_external_api_many, payloads),
+                                (client.process_webhooks, webhooks),
+                            ):
+                                started = time.perf_counter()
+                                timings.append((await method(items), time.perf_counter() - started))
+                            return timings
+
+                    (api_results, api_elapsed), (webhook_results, webhook_elapsed) = asyncio.run(run())
+                remaining = processor.fetch_users_bulk(range(1, size + 1))
+                processor.close()
+                http_requests = dict(server.request_counts)
+
+            if any(result is None for result in api_results):
+                raise RuntimeError(f"{mode}: {sum(r is None for r in api_results)} of {size} API calls failed")
+            if any(result["status"] != "processed" for result in webhook_results):
+                raise RuntimeError(f"{mode}: not every webhook was processed")
+            if remaining is None or remaining:
+                raise RuntimeError(f"{mode}: {len(remaining or ())} users survived their delete webhooks")
+            results.append({
+                "requests": size,
+                "mode": mode,
+                "api_calls_per_sec": round(size / api_elapsed),
+                "webhooks_per_sec": round(size / webhook_elapsed),
+                "http_requests": http_requests,
+            })
+    return results
+
+
+def benchmark_s3_uploads(sizes=(200,), file_kb=512, concurrency=8, part_size_mb=5):
+    """Throughput of upload_to_cloud loops versus upload_many against an in-process moto S3."""
+    from moto import mock_aws
+
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir, mock_aws():
+            service._S3_CLIENTS.clear()
+            paths = []
+            for index in range(size):
+                path = os.path.join(workdir, f"export-{index:06d}.bin")
+                with open(path, "wb") as handle:
+                    handle.write(os.urandom(file_kb * 1024))
+                paths.append(path)
+
+            processor = _processor_for(":memory:")
+            processor._s3_client().create_bucket(Bucket="benchmark-bucket")
+
+            def upload_loop():
+                return all(processor.upload_to_cloud(path, "benchmark-bucket") for path in paths)
+
+            loop_ok, loop_elapsed = _timed(upload_loop)
+            report, bulk_elapsed = _timed(
+                lambda: processor.upload_many(
+                    paths,
+                    "benchmark-bucket",
+                    concurrency=concurrency,
+                    part_size_mb=part_size_mb,
+                )
+            )
+            service._S3_CLIENTS.clear()
+
+        total_mb = size * file_kb / 1024
+        results.append({
+            "files": size,
+            "file_kb": file_kb,
+            "loop_ok": loop_ok,
+            "loop_s": round(loop_elapsed, 4),
+            "loop_mb_s": round(total_mb / loop_elapsed, 3),
+            "bulk_ok": not report["failed"],
+            "bulk_s": round(bulk_elapsed, 4),
+            "bulk_mb_s": report["throughput_mb_s"],
+        })
+    return results
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@contextmanager
+def local_smtp_server():
+    """Run an aiosmtpd sink on localhost that counts delivered messages."""
+    from aiosmtpd.controller import Controller
+
+    class _CountingHandler:
+        def __init__(self):
+            self.delivered = 0
+
+        async def handle_DATA(self, server, session, envelope):
+            self.delivered += 1
+            return "250 Message accepted for delivery"
+
+    handler = _CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+
+def benchmark_notifications(sizes=(1_000,)):
+    """Per-message SMTP connections versus the pooled bulk sender against a local aiosmtpd sink."""
+    import smtplib
+
+    results = []
+    for size in sizes:
+        messages = [(f"oncall{index}@example.com", "Incident update", f"Update #{index}") for index in range(size)]
+        with local_smtp_server() as (controller, handler):
+            host, port = controller.hostname, controller.port
+            processor = _processor_for(":memory:")
+
+            def connect_per_message():
+                for recipient, subject, body in messages:
+                    with smtplib.SMTP(host, port, timeout=processor.request_timeout) as server:
+                        server.send_message(processor._build_message(recipient, subject, body))
+
+            _, per_message = _timed(connect_per_message)
+
+            # The local sink speaks plain SMTP without AUTH, so the pool skips STARTTLS and login.
+            processor.smtp_password = processor.smtp_password or "benchmark"
+            processor._smtp_pool = service.SMTPConnectionPool(host, port, use_starttls=False)
+            sent, pooled = _timed(processor.send_notifications_bulk, messages)
+
+            worker = service.NotificationWorker(processor, workers=2, max_queue=100).start()
+            started = time.perf_counter()
+            futures = [worker.submit(*message) for message in messages]
+            worker.stop()
+            worker_elapsed = time.perf_counter() - started
+            pool_stats = processor._smtp_pool.stats()
+            processor.close()
+            delivered = handler.delivered
+
+        results.append({
+            "messages": size,
+            "per_message_s": round(per_message, 4),
+            "pooled_bulk_s": round(pooled, 4),
+            "pooled_speedup": round(per_message / pooled, 2),
+            "pooled_sent": sum(sent),
+            "worker_s": round(worker_elapsed, 4),
+            "worker_sent": sum(future.result() for future in futures),
+            "delivered": delivered,
+            "smtp_pool": pool_stats,
+        })
+    return results
+
+
+def benchmark_hash_micro(sizes=(200_000,)):
+    """ns/op for _hash_sensitive_value on card-number-like strings."""
+    results = []
+    for size in sizes:
+        values = [f"4111-1111-{index:08d}" for index in range(size)]
+        hash_value = service._hash_sensitive_value
+        started = time.perf_counter()
+        for value in values:
+            hash_value(value)
+        elapsed = time.perf_counter() - started
+        results.append({
+            "values": size,
+            "keyed": bool(service.get_settings().data_protection_key),
+            "ns_per_op": round(elapsed / size * 1e9, 1),
+            "ops_per_sec": round(size / elapsed),
+        })
+    return results
+
+
+def benchmark_trigger_micro(sizes=(50_000,)):
+    """Per-row INSERT cost through the hashing triggers, with and without pre-hashed values."""
+    results = []
+    for size in sizes:
+        rows = list(_sample_rows(size))
+        cases = (
+            ("no_triggers", False, rows),
+            ("triggers", True, rows),
+            ("triggers_prehashed", True, list(service.hash_sensitive_rows(rows))),
+        )
+        entry = {"rows": size}
+        for name, with_triggers, params in cases:
+            conn = sqlite3.connect(":memory:")
+            service._prepare_connection(conn)
+            if with_triggers:
+                service._ensure_schema(conn)
+            else:
+                conn.executescript(service._USER_DATA_TABLE_SQL)
+            started = time.perf_counter()
+            conn.executemany(service._UPSERT_USER_SQL, params)
+            conn.commit()
+            elapsed = time.perf_counter() - started
+            conn.close()
+            entry[f"{name}_us_per_row"] = round(elapsed / size * 1e6, 3)
+        results.append(entry)
+    return results
+
+
+def benchmark_export(sizes=(200_000,), formats=("csv", "jsonl", "parquet"), readers=(1, 4), batch_size=10_000):
+    """Rows/sec and traced peak memory of export_users per format and reader count."""
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            processor = _processor_for(os.path.join(workdir, "export.db"))
+            processor.upsert_users_bulk(_sample_rows(size))
+            for fmt in formats:
+                for reader_count in readers:
+                    tracemalloc.start()
+                    stats = processor.export_users(
+                        os.path.join(workdir, f"users.{fmt}"), fmt, batch_size, reader_count
+                    )
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    if stats is None or stats["rows"] != size:
+                        raise RuntimeError(f"Export to {fmt} wrote {0 if stats is None else stats['rows']} of {size} rows")
+                    results.append({
+                        "rows": size,
+                        "format": fmt,
+                        "readers": reader_count,
+                        "export_s": stats["seconds"],
+                        "rows_per_sec": stats["rows_per_sec"],
+                        "peak_traced_mb": round(peak / 2**20, 1),
+                    })
+            processor.close()
+    return results
+
+
+def benchmark_webhook_engine(sizes=(20_000,), shards=4, batch_sizes=(1, 100, 1000), concurrency=16):
+    """Delete-webhook throughput: per-webhook commits from threads versus the sharded engine per batch size."""
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            processor = _processor_for(os.path.join(workdir, "webhooks.db"))
+            processor.upsert_users_bulk(_sample_rows(size * (len(batch_sizes) + 1)))
+
+            def per_webhook():
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    list(executor.map(processor._delete_user_record, range(1, size + 1)))
+
+            _, elapsed = _timed(per_webhook)
+            results.append({
+                "webhooks": size,
+                "mode": "per_webhook_commit",
+                "batch_size": 1,
+                "webhooks_per_sec": round(size / elapsed),
+                "commits_per_sec": round(size / elapsed),
+            })
+            for offset, batch_size in enumerate(batch_sizes, start=1):
+                engine = service.ShardedWebhookEngine(processor, shards=shards, batch_size=batch_size, forward=False)
+                # Warm up the worker processes so start-up is not billed to the batch.
+                engine.process([{"user_id": 0, "action": "delete_user"}])
+                before = engine.metrics()
+                webhooks = [
+                    {"user_id": user_id, "action": "delete_user"}
+                    for user_id in range(offset * size + 1, (offset + 1) * size + 1)
+                ]
+                _, elapsed = _timed(engine.process, webhooks)
+                after = engine.metrics()
+                engine.close()
+                commits = after["commits"] - before["commits"]
+                results.append({
+                    "webhooks": size,
+                    "mode": "sharded",
+                    "shards": shards,
+                    "batch_size": batch_size,
+                    "webhooks_per_sec": round(size / elapsed),
+                    "commits_per_sec": round(commits / elapsed, 1),
+                    "avg_batch": round(size / commits, 1) if commits else 0.0,
+                    "lock_wait_ms": round(after["lock_wait_ms_total"] - before["lock_wait_ms_total"], 3),
+                })
+            with processor.db_pool.connection() as conn:
+                remaining = conn.execute("SELECT COUNT(*) FROM user_data").fetchone()[0]
+            processor.close()
+        if remaining:
+            raise RuntimeError(f"{remaining} users left after deleting all of them")
+    return results
+
+
+# Modules the service must not load at import or DataProcessor() time; each costs 5-100 ms.
+_LAZY_MODULES = (
+    "requests", "asyncio", "ssl", "sqlite3", "hashlib", "hmac", "boto3", "aiohttp", "concurrent.futures.process",
+)
+_IMPORT_SCENARIOS = {
+    "import": "import Security_Issue_Python_code_unmarked as service",
+    "cold_start": "import Security_Issue_Python_code_unmarked as service; service.DataProcessor()",
+}
+
+
+def _measure_import(statement):
+    """Run ``statement`` in a fresh interpreter under -X importtime."""
+    probe = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps([elapsed, [name for name in {_LAZY_MODULES!r} if name in sys.modules]]))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=os.path.dirname(os.path.abspath(service.__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    import_us = next(
+        int(line.split("|")[1])
+        for line in reversed(completed.stderr.splitlines())
+        if line.startswith("import time:") and line.rstrip().endswith(f"| {service.__name__}")
+    )
+    return import_us / 1000, elapsed * 1000, loaded
+
+
+def benchmark_import_time(runs=7, budget_ms=50.0):
+    """
+    Median -X importtime cost of the service module and of import plus DataProcessor().
+
+    Raises when a median exceeds ``budget_ms`` or a lazily imported dependency
+    is loaded eagerly. The module is byte-compiled first so PYTHONDONTWRITEBYTECODE
+    environments do not measure source compilation.
+    """
+    py_compile.compile(service.__file__, doraise=True)
+    results = []
+    for mode, statement in _IMPORT_SCENARIOS.items():
+        samples = [_measure_import(statement) for _ in range(runs)]
+        entry = {
+            "mode": mode,
+            "import_ms": round(statistics.median(sample[0] for sample in samples), 3),
+            "wall_ms": round(statistics.median(sample[1] for sample in samples), 3),
+            "eager_modules": sorted({name for sample in samples for name in sample[2]}),
+        }
+        results.append(entry)
+        if entry["wall_ms"] > budget_ms or entry["eager_modules"]:
+            raise RuntimeError(
+                f"{mode} took {entry['wall_ms']} ms (budget {budget_ms} ms), eager modules: {entry['eager_modules']}"
+            )
+    return results
+
+
+def _rss_mb():
+    """Current resident set size in MiB (Linux /proc), falling back to the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as handle:
+            return round(int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 2)
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024, 2)
+
+
+def _latency_summary(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    pick = lambda fraction: samples[min(int(fraction * len(samples)), len(samples) - 1)]
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+    }
+
+
+# Operation weights per traffic mix; weights are relative within a mix.
+LOAD_MIXES = {
+    "webhook_storm": {"webhook": 1.0},
+    "bulk_lookups": {"lookup": 0.8, "bulk_lookup": 0.2},
+    "upload_burst": {"upload": 1.0},
+    "notification_burst": {"notification": 1.0},
+    "mixed": {"webhook": 0.35, "lookup": 0.3, "bulk_lookup": 0.05, "api": 0.15, "upload": 0.05, "notification": 0.1},
+}
+
+
+def run_load(mix="mixed", operations=5_000, concurrency=16, users=10_000, file_kb=64, delay_ms=1.0, seed=0):
+    """
+    Drive one DataProcessor with a seeded operation mix at ``concurrency`` threads.
+
+    Everything runs against local stand-ins: the stub API doubles as the
+    webhook sink, moto provides S3, an aiosmtpd sink receives notification
+    emails and SQLite lives in a temporary directory.
+    Returns throughput, latency percentiles per operation and RSS.
+    """
+    weights = LOAD_MIXES[mix]
+    rng = random.Random(seed)
+    plan = rng.choices(list(weights), weights=list(weights.values()), k=operations)
+    user_ids = [rng.randint(1, users) for _ in range(operations)]
+
+    with ExitStack() as stack:
+        workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(stub_api_server(delay_ms=delay_ms))
+        processor = _processor_for(os.path.join(workdir, "load.db"))
+        processor.api_key = processor.api_key or "benchmark-key"
+        processor.db_pool_size = max(processor.db_pool_size, concurrency)
+        stack.callback(processor.close)
+        processor.upsert_users_bulk(_sample_rows(users))
+
+        upload_paths = []
+        if "upload" in weights:
+            from moto import mock_aws
+
+            stack.enter_context(mock_aws())
+            service._S3_CLIENTS.clear()
+            stack.callback(service._S3_CLIENTS.clear)
+            processor._s3_client().create_bucket(Bucket="load-bucket")
+            payload_path = os.path.join(workdir, "payload.bin")
+            with open(payload_path, "wb") as handle:
+                handle.write(os.urandom(file_kb * 1024))
+            # One key per upload (hard links share the payload): moto is not safe for concurrent same-key PUTs.
+            for index, operation in enumerate(plan):
+                path = None
+                if operation == "upload":
+                    path = os.path.join(workdir, f"burst-{index:06d}.bin")
+                    os.link(payload_path, path)
+                upload_paths.append(path)
+
+        if "notification" in weights:
+            controller, _handler = stack.enter_context(local_smtp_server())
+            # The local sink speaks plain SMTP without AUTH, so the pool skips STARTTLS and login.
+            processor.smtp_password = processor.smtp_password or "benchmark"
+            processor._smtp_pool = service.SMTPConnectionPool(
+                controller.hostname, controller.port, use_starttls=False, max_size=concurrency,
+                timeout=processor.request_timeout,
+            )
+            # Close pooled sessions while the sink is still up (the stack unwinds in reverse).
+            stack.callback(processor._smtp_pool.close)
+
+        def run_operation(index):
+            operation, user_id = plan[index], user_ids[index]
+            started = time.perf_counter()
+            if operation == "webhook":
+                action = "delete_user" if index % 10 == 0 else "update_user"
+                ok = processor.process_webhook_data({"user_id": user_id, "action": action})["status"] != "error"
+            elif operation == "lookup":
+                processor.fetch_user_data(user_id)
+                ok = True
+            elif operation == "bulk_lookup":
+                ok = processor.fetch_users_bulk(range(user_id, user_id + 500)) is not None
+            elif operation == "api":
+                ok = processor.call_external_api({"record": index}) is not None
+            elif operation == "notification":
+                ok = processor.send_notification_email(f"user{user_id}@example.com", "Account update", f"Event #{index}")
+            else:
+                ok = processor.upload_to_cloud(upload_paths[index], "load-bucket")
+            return operation, time.perf_counter() - started, ok
+
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(run_operation, range(operations)))
+        elapsed = time.perf_counter() - started
+        rss_after = _rss_mb()
+
+    by_operation = {}
+    for operation, seconds, ok in outcomes:
+        samples, failures = by_operation.setdefault(operation, ([], [0]))
+        samples.append(seconds)
+        failures[0] += not ok
+    return {
+        "mix": mix,
+        "operations": operations,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(operations / elapsed, 1),
+        **_latency_summary([seconds for _operation, seconds, _ok in outcomes]),
+        "errors": sum(failures[0] for _samples, failures in by_operation.values()),
+        "rss_before_mb": rss_before,
+        "rss_after_mb": rss_after,
+        "by_operation": {
+            operation: {"count": len(samples), "errors": failures[0], **_latency_summary(samples)}
+            for operation, (samples, failures) in sorted(by_operation.items())
+        },
+    }
+
+
+def benchmark_load(mixes=("webhook_storm", "bulk_lookups", "upload_burst", "notification_burst", "mixed"),
+                   operations=5_000, concurrency=16):
+    return [run_load(mix, operations=operations, concurrency=concurrency) for mix in mixes]
+
+
+# Metric-name suffixes that are compared against a baseline, and which direction is better.
+_HIGHER_IS_BETTER = ("per_sec", "speedup", "mb_s")
+_LOWER_IS_BETTER = ("_ms", "_s", "_us_per_row", "ns_per_op")
+# Failure counts: any increase over the baseline is a regression, whatever the threshold.
+_ERROR_COUNTS = ("errors", "failed")
+# Smallest absolute change that counts for a time metric, so jitter in sub-millisecond values is not gated.
+_MIN_TIME_DELTA = {"_ms": 1.0, "_s": 0.001}
+# Fields that identify a result entry, so baselines match by configuration rather than position.
+_RESULT_IDENTITY_FIELDS = (
+    "mix", "mode", "batch_size", "webhooks", "format", "readers", "rows", "values", "requests", "files", "messages",
+    "workers", "concurrency", "operations",
+)
+
+
+def _entry_label(item, index):
+    if isinstance(item, dict):
+        identity = [f"{field}={item[field]}" for field in _RESULT_IDENTITY_FIELDS if field in item]
+        if identity:
+            return ",".join(identity)
+    return str(index)
+
+
+def _flatten_metrics(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten_metrics(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _flatten_metrics(item, f"{prefix}[{_entry_label(item, index)}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def find_regressions(results, baseline, threshold=0.10):
+    """
+    Compare tracked metrics with a baseline produced by the same benchmark.
+
+    Returns a list of {"metric", "baseline", "current", "change"} entries for
+    metrics that got worse by more than ``threshold`` (0.10 = 10%), and for
+    error counts that went up at all (``change`` is None when the baseline
+    had none). Time metrics must also move by more than _MIN_TIME_DELTA.
+    """
+    current = dict(_flatten_metrics(results))
+    regressions = []
+    for metric, previous in _flatten_metrics(baseline):
+        name = metric.rsplit(".", 1)[-1]
+        if metric not in current:
+            continue
+        if name in _ERROR_COUNTS:
+            if current[metric] > previous:
+                regressions.append({
+                    "metric": metric,
+                    "baseline": previous,
+                    "current": current[metric],
+                    "change": round((current[metric] - previous) / previous, 4) if previous else None,
+                })
+            continue
+        # RSS depends on what ran earlier in the process, so it is recorded but not gated.
+        if not previous or name.startswith("rss"):
+            continue
+        if name.endswith(_HIGHER_IS_BETTER):
+            change = (previous - current[metric]) / previous
+        elif name.endswith(_LOWER_IS_BETTER):
+            change = (current[metric] - previous) / previous
+            floor = next((delta for suffix, delta in _MIN_TIME_DELTA.items() if name.endswith(suffix)), 0.0)
+            if current[metric] - previous <= floor:
+                continue
+        else:
+            continue
+        if change > threshold:
+            regressions.append({
+                "metric": metric,
+                "baseline": previous,
+                "current": current[metric],
+                "change": round(change, 4),
+            })
+    return regressions
+
+
+BENCHMARKS = {
+    "api_batching": benchmark_api_batching,
+    "async": benchmark_async_processor,
+    "bulk": benchmark_bulk_user_access,
+    "export": benchmark_export,
+    "hash_micro": benchmark_hash_micro,
+    "hashing": benchmark_hashing_modes,
+    "import_time": benchmark_import_time,
+    "load": benchmark_load,
+    "notifications": benchmark_notifications,
+    "s3": benchmark_s3_uploads,
+    "trigger_micro": benchmark_trigger_micro,
+    "webhook_engine": benchmark_webhook_engine,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", help="Row counts to benchmark")
+    parser.add_argument("--mixes", nargs="+", choices=sorted(LOAD_MIXES), help="Traffic mixes for the load benchmark")
+    parser.add_argument("--operations", type=int, help="Operations per load mix")
+    parser.add_argument("--concurrency", type=int, help="Concurrent callers")
+    parser.add_argument("--budget-ms", type=float, help="Import/cold-start budget for the import_time benchmark")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed regression ratio (default 0.10)")
+    args = parser.parse_args()
+
+    benchmark = BENCHMARKS[args.benchmark]
+    accepted = inspect.signature(benchmark).parameters
+    kwargs = {}
+    for name, value in (
+        ("sizes", tuple(args.sizes) if args.sizes else None),
+        ("mixes", tuple(args.mixes) if args.mixes else None),
+        ("operations", args.operations),
+        ("concurrency", args.concurrency),
+        ("budget_ms", args.budget_ms),
+    ):
+        if value is not None and name in accepted:
+            kwargs[name] = value
+    results = benchmark(**kwargs)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump({"benchmark": args.benchmark, "options": kwargs, "results": results}, handle, indent=2, default=list)
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline.get("benchmark", args.benchmark) != args.benchmark:
+            sys.exit(f"{args.baseline} was recorded for the {baseline['benchmark']!r} benchmark")
+        baseline = baseline.get("results", baseline)
+        if not {metric for metric, _value in _flatten_metrics(baseline)} & {
+            metric for metric, _value in _flatten_metrics(results)
+        }:
+            # Entries are matched by configuration (_RESULT_IDENTITY_FIELDS); nothing matching means nothing was checked.
+            sys.exit(f"No result in {args.baseline} matches this run's configuration; rerun with the baseline's options")
+        regressions = find_regressions(results, baseline, args.threshold)
+        for regression in regressions:
+            change = "new" if regression["change"] is None else f"{regression['change']:+.1%}"
+            print(
+                f"REGRESSION {regression['metric']}: {regression['baseline']} -> {regression['current']} ({change})",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
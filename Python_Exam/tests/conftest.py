@@ -0,0 +1,32 @@
+"""
+Shared fixtures for the DataProcessor service tests
+Run from the Python_Exam directory: python -m pytest -q
+
+The fixtures reuse the local stand-ins from data_processor_benchmarks, so the
+tests and the benchmarks exercise the same stub API, SMTP sink and moto S3.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_processor_benchmarks as benchmarks  # noqa: E402
+
+
+@pytest.fixture
+def stub_api():
+    """The stub processing API/webhook sink, with the service settings pointed at it."""
+    with benchmarks.stub_api_server() as server:
+        yield server
+
+
+@pytest.fixture
+def processor(stub_api, tmp_path):
+    """A DataProcessor on a temporary database, configured for the stub API."""
+    processor = benchmarks._processor_for(str(tmp_path / "service.db"))
+    processor.api_key = "test-key"
+    yield processor
+    processor.close()
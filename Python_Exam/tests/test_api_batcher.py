@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import Security_Issue_Python_code_unmarked as service
+
+BATCH_PATH = "/v1/process/batch"
+
+
+@pytest.fixture
+def batcher(processor):
+    batcher = service.ApiRequestBatcher(processor, max_batch_size=10, linger_ms=20.0)
+    yield batcher
+    batcher.close()
+
+
+def test_results_fan_out_to_each_caller(batcher, stub_api):
+    payloads = [{"record": index} for index in range(25)]
+
+    with ThreadPoolExecutor(max_workers=25) as executor:
+        results = list(executor.map(batcher.call, payloads))
+
+    assert results == [{"processed": payload} for payload in payloads]
+    metrics = batcher.metrics()
+    assert metrics["items_sent"] == 25
+    assert metrics["batches_sent"] == stub_api.request_counts[BATCH_PATH] >= 3
+    assert metrics["failed_batches"] == 0
+
+
+def test_identical_payloads_share_one_request(batcher, stub_api):
+    futures = [batcher.submit({"record": 1, "kind": "a"}) for _ in range(3)]
+    futures.append(batcher.submit({"kind": "a", "record": 1}))
+    other = batcher.submit({"record": 2})
+
+    assert len({id(future) for future in futures}) == 1
+    assert futures[0].result(5) == {"processed": {"record": 1, "kind": "a"}}
+    assert other.result(5) == {"processed": {"record": 2}}
+    metrics = batcher.metrics()
+    assert metrics["deduplicated"] == 3
+    assert metrics["items_sent"] == 2
+
+
+def test_failed_batch_resolves_every_caller_to_none(batcher, stub_api):
+    stub_api.fail_paths.add(BATCH_PATH)
+
+    futures = [batcher.submit({"record": index}) for index in range(5)]
+
+    assert [future.result(5) for future in futures] == [None] * 5
+    assert batcher.metrics()["failed_batches"] >= 1
+    assert stub_api.request_counts.get("/v1/process") is None
+
+
+def test_close_flushes_pending_payloads_and_rejects_new_ones(processor, stub_api):
+    batcher = service.ApiRequestBatcher(processor, max_batch_size=100, linger_ms=10_000.0)
+    future = batcher.submit({"record": 1})
+
+    batcher.close()
+
+    assert future.result(0) == {"processed": {"record": 1}}
+    with pytest.raises(RuntimeError):
+        batcher.submit({"record": 2})
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import Security_Issue_Python_code_unmarked as service  # noqa: E402
+from data_processor_benchmarks import _sample_rows  # noqa: E402
+
+
+def _run(processor, method, items, **options):
+    async def run():
+        async with service.AsyncDataProcessor(processor, **options) as client:
+            return await getattr(client, method)(items)
+
+    return asyncio.run(run())
+
+
+def test_call_external_api_many_returns_results_in_order(processor, stub_api):
+    payloads = [{"record": index} for index in range(20)]
+
+    results = _run(processor, "call_external_api_many", payloads)
+
+    assert results == [{"processed": payload} for payload in payloads]
+    assert stub_api.request_counts == {"/v1/process": 20}
+
+
+def test_failed_api_calls_resolve_to_none(processor, stub_api):
+    stub_api.fail_paths.add("/v1/process")
+
+    assert _run(processor, "call_external_api_many", [{"record": 1}, {"record": 2}]) == [None, None]
+
+
+def test_requests_per_destination_are_bounded(processor, stub_api):
+    stub_api.delay = 0.05
+
+    results = _run(processor, "call_external_api_many", [{"record": index} for index in range(12)],
+                   per_destination_limit=3)
+
+    assert None not in results
+    assert stub_api.max_active == 3
+
+
+def test_process_webhooks_deletes_then_forwards(processor, stub_api):
+    processor.upsert_users_bulk(_sample_rows(5))
+    webhooks = [{"user_id": user_id, "action": "delete_user"} for user_id in range(1, 4)]
+
+    results = _run(processor, "process_webhooks", webhooks + [{"action": "delete_user"}])
+
+    assert results[:3] == [{"status": "processed", "webhook_response": 200}] * 3
+    assert results[3] == {"status": "ignored", "reason": "invalid user_id"}
+    assert stub_api.request_counts == {"/webhook": 3}
+    assert sorted(processor.fetch_users_bulk(range(1, 6))) == [4, 5]
+
+
+def test_webhook_sink_failure_is_reported(processor, stub_api):
+    stub_api.fail_paths.add("/webhook")
+
+    [result] = _run(processor, "process_webhooks", [{"user_id": 1, "action": "update_user"}])
+
+    assert result["status"] == "error"
+    assert "500" in result["message"]
@@ -0,0 +1,18 @@
+import pytest
+
+from data_processor_benchmarks import benchmark_import_time
+
+# Same budget as `python data_processor_benchmarks.py import_time`; the module currently imports in ~15 ms.
+IMPORT_BUDGET_MS = 50.0
+
+
+def test_import_and_cold_start_stay_within_budget():
+    try:
+        results = benchmark_import_time(runs=5, budget_ms=IMPORT_BUDGET_MS)
+    except RuntimeError as e:
+        pytest.fail(str(e))
+
+    assert [entry["mode"] for entry in results] == ["import", "cold_start"]
+    for entry in results:
+        assert entry["eager_modules"] == []
+        assert entry["wall_ms"] <= IMPORT_BUDGET_MS
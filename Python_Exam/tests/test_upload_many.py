@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+pytest.importorskip("moto")
+
+import Security_Issue_Python_code_unmarked as service  # noqa: E402
+
+BUCKET = "test-bucket"
+
+
+@pytest.fixture
+def s3(processor):
+    from moto import mock_aws
+
+    with mock_aws():
+        service._S3_CLIENTS.clear()
+        client = processor._s3_client()
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+        service._S3_CLIENTS.clear()
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def _object(s3, key):
+    return s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def test_results_are_keyed_by_relative_object_key(processor, s3, tmp_path):
+    first = _write(tmp_path / "exports" / "a" / "users.csv", b"first")
+    second = _write(tmp_path / "exports" / "b" / "users.csv", b"second")
+
+    report = processor.upload_many([first, second, first], BUCKET, concurrency=2)
+
+    assert report["files"] == report["succeeded"] == 2
+    assert report["failed"] == []
+    assert report["bytes"] == len(b"first") + len(b"second")
+    assert sorted(report["results"]) == ["a/users.csv", "b/users.csv"]
+    assert report["results"]["a/users.csv"]["path"] == first
+    assert report["results"]["a/users.csv"]["attempts"] == 1
+    assert _object(s3, "a/users.csv") == b"first"
+    assert _object(s3, "b/users.csv") == b"second"
+
+
+def test_colliding_keys_are_rejected_before_uploading(processor, s3, tmp_path):
+    first = _write(tmp_path / "a" / "users.csv", b"first")
+    second = _write(tmp_path / "b" / "users.csv", b"second")
+
+    with pytest.raises(ValueError):
+        processor.upload_many([first, second], BUCKET, key=os.path.basename)
+
+    assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET)
+
+
+def test_transient_failure_is_retried(processor, s3, tmp_path, monkeypatch):
+    path = _write(tmp_path / "report.bin", b"payload")
+    upload_file = s3.upload_file
+    calls = []
+
+    def flaky_upload(*args, **kwargs):
+        calls.append(args[2])
+        if len(calls) == 1:
+            raise ConnectionError("connection reset")
+        return upload_file(*args, **kwargs)
+
+    monkeypatch.setattr(s3, "upload_file", flaky_upload)
+
+    report = processor.upload_many([path], BUCKET, retries=2)
+
+    assert calls == ["report.bin", "report.bin"]
+    assert report["failed"] == []
+    assert report["results"]["report.bin"]["attempts"] == 2
+    assert report["results"]["report.bin"]["error"] is None
+    assert _object(s3, "report.bin") == b"payload"
+
+
+def test_failures_are_reported_per_file(processor, s3, tmp_path, monkeypatch):
+    good = _write(tmp_path / "good.bin", b"ok")
+    bad = _write(tmp_path / "bad.bin", b"nope")
+    missing = str(tmp_path / "missing.bin")
+    upload_file = s3.upload_file
+
+    def upload_or_fail(path, *args, **kwargs):
+        if path == bad:
+            raise ConnectionError("connection reset")
+        return upload_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(s3, "upload_file", upload_or_fail)
+
+    report = processor.upload_many([good, bad, missing], BUCKET, retries=1)
+
+    assert report["succeeded"] == 1
+    assert sorted(report["failed"]) == ["bad.bin", "missing.bin"]
+    assert report["results"]["bad.bin"]["attempts"] == 2
+    assert "connection reset" in report["results"]["bad.bin"]["error"]
+    assert report["results"]["missing.bin"]["attempts"] == 0
+    assert report["bytes"] == len(b"ok")
@@ -0,0 +1,65 @@
+"""UserDataClient lives in marvin_domingo.ipynb; its cell is loaded without the demo code that calls the real API."""
+
+import json
+import os
+
+import pytest
+
+NOTEBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "marvin_domingo.ipynb")
+
+
+@pytest.fixture(scope="module")
+def cell():
+    with open(NOTEBOOK, encoding="utf-8") as handle:
+        cells = json.load(handle)["cells"]
+    source = next(
+        "".join(cell["source"]) for cell in cells
+        if cell["cell_type"] == "code" and "class UserDataClient" in "".join(cell["source"])
+    )
+    namespace = {"__name__": "user_data_cell"}
+    exec(compile(source.split("# Test your solution here")[0], NOTEBOOK, "exec"), namespace)
+    return namespace
+
+
+@pytest.fixture
+def users():
+    return {user_id: {"id": user_id, "name": f"Stub User {user_id}"} for user_id in range(1, 4)}
+
+
+def test_not_found_users_are_cached_as_misses(cell, users):
+    with cell["local_users_api"](users) as (base_url, server):
+        with cell["UserDataClient"](base_url=base_url) as client:
+            assert client.get_user(42) is None
+            assert client.get_user(42) is None
+            assert client.get_users([1, 1, 2]) == {1: users[1], 2: users[2]}
+            stats = client.stats()
+
+    assert server.requests == 3
+    assert stats["negative_hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_expired_misses_are_fetched_again(cell, users):
+    with cell["local_users_api"](users) as (base_url, server):
+        with cell["UserDataClient"](base_url=base_url, negative_ttl=0.0) as client:
+            client.get_user(42)
+            users[42] = {"id": 42, "name": "Late Arrival"}
+            assert client.get_user(42) == users[42]
+
+    assert server.requests == 2
+
+
+def test_cached_users_are_served_while_the_api_is_down(cell, users):
+    with cell["local_users_api"](users) as (base_url, server):
+        client = cell["UserDataClient"](base_url=base_url, ttl=0.0, timeout=1)
+        assert client.get_user(2) == users[2]
+
+    # The stub is shut down: every fetch now fails to connect.
+    with client:
+        assert client.get_user(2) == users[2]
+        assert client.get_user(3) is None
+    stats = client.stats()
+
+    assert stats["stale_hits"] == 1
+    assert stats["served_stale_on_error"] == 1
+    assert stats["errors"] == 2